@@ -0,0 +1,56 @@
+"""Tests for command-line argument parsing."""
+
+import pytest
+from unittest.mock import patch
+from treewriter.cli import _build_parser, main, parse_args
+
+
+class TestParseArgs:
+    """Tests for command-line argument parsing."""
+    
+    def test_parser_is_cached(self):
+        """Test the argparse parser is built only once."""
+        assert _build_parser() is _build_parser()
+    
+    def test_parse_args_reads_api_key_from_env(self, monkeypatch):
+        """Test API key falls back to the environment variable."""
+        monkeypatch.setenv("OPENAI_API_KEY", "env_key")
+        args = parse_args(["task", "--word-count", "1000"])
+        assert args.api_key == "env_key"
+    
+    def test_parse_args_invalid_exits(self):
+        """Test invalid arguments still produce an argparse error."""
+        with pytest.raises(SystemExit):
+            parse_args(["task", "--word-count", "many"])
+
+
+class TestMain:
+    """Tests for the CLI entry point with a mocked TreeWriter."""
+    
+    def test_output_file_is_streamed(self, tmp_path, capsys):
+        """Test generated chunks are written to the output file."""
+        output = tmp_path / "story.txt"
+        with patch("treewriter.orchestrator.TreeWriter") as writer_cls:
+            writer_cls.return_value.generate_stream.return_value = iter(["Once upon", "\n\n", "很久以前"])
+            main(["Story", "--word-count", "100", "--api-key", "k", "-o", str(output)])
+        
+        assert output.read_text(encoding="utf-8") == "Once upon\n\n很久以前"
+        assert "Word count: 6 words" in capsys.readouterr().out
+        writer_cls.return_value.close.assert_called_once()
+    
+    def test_failed_run_keeps_existing_output(self, tmp_path):
+        """Test an error during generation leaves the output file unchanged."""
+        output = tmp_path / "story.txt"
+        output.write_text("Previous story", encoding="utf-8")
+        
+        def generate_stream(**kwargs):
+            yield "Once upon"
+            raise RuntimeError("API error")
+        
+        with patch("treewriter.orchestrator.TreeWriter") as writer_cls:
+            writer_cls.return_value.generate_stream.side_effect = generate_stream
+            with pytest.raises(SystemExit):
+                main(["Story", "--word-count", "100", "--api-key", "k", "-o", str(output)])
+        
+        assert output.read_text(encoding="utf-8") == "Previous story"
+        assert list(tmp_path.iterdir()) == [output]
@@ -1,6 +1,7 @@
 """Tests for configuration dataclasses."""
 
 import pytest
+from dataclasses import FrozenInstanceError, fields, replace
 from treewriter.config import ModelConfig, ThresholdConfig, NodeMetadata
 
 
@@ -81,6 +82,41 @@ class TestModelConfig:
         )
         with pytest.raises(ValueError, match="top_p must be between"):
             config.validate()
+    
+    def test_config_is_frozen_and_hashable(self):
+        """Test model config cannot be modified and can be used as a key."""
+        config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        config.validate()
+        
+        with pytest.raises(FrozenInstanceError):
+            config.temperature = 3.0
+        
+        same = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        assert hash(config) == hash(same)
+        assert config == same
+    
+    def test_replaced_config_is_validated(self):
+        """Test a modified copy of a validated config is checked again."""
+        config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        config.validate()
+        
+        with pytest.raises(ValueError, match="temperature must be between"):
+            replace(config, temperature=3.0).validate()
 
 
 class TestThresholdConfig:
@@ -119,6 +155,21 @@ class TestThresholdConfig:
         config = ThresholdConfig(min_children=5, max_children=2)
         with pytest.raises(ValueError, match="max_children.*must be >="):
             config.validate()
+    
+    def test_invalid_plan_cache_similarity(self):
+        """Test plan_cache_similarity outside (0, 1]."""
+        config = ThresholdConfig(plan_cache_similarity=1.5)
+        with pytest.raises(ValueError, match="plan_cache_similarity must be in"):
+            config.validate()
+    
+    def test_revalidates_after_change(self):
+        """Test a validated config is checked again after a field changes."""
+        config = ThresholdConfig()
+        config.validate()
+        
+        config.min_children = 1
+        with pytest.raises(ValueError, match="min_children must be at least 2"):
+            config.validate()
 
 
 class TestNodeMetadata:
@@ -147,6 +198,18 @@ class TestNodeMetadata:
         assert data["word_count"] == 1000
         assert data["story_setting"] == "Fantasy world"
     
+    def test_to_dict_includes_all_fields(self):
+        """Test to_dict returns every field without copying list values."""
+        characters = ["Alice", "Bob"]
+        metadata = NodeMetadata(
+            content="Test content",
+            word_count=1000,
+            character_list=characters
+        )
+        data = metadata.to_dict()
+        assert set(data) == {f.name for f in fields(NodeMetadata)}
+        assert data["character_list"] is characters
+    
     def test_from_dict(self):
         """Test creating metadata from dictionary."""
         data = {
@@ -0,0 +1,137 @@
+"""Tests for shared LLM client helpers."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from openai import AuthenticationError, RateLimitError, APITimeoutError
+from treewriter import llm
+from treewriter.config import ModelConfig
+from treewriter.llm import acall_with_retry, call_with_retry, create_http_client, get_client, run_batch
+from treewriter.utils import BatchError
+
+
+def api_error(error_cls, status_code, headers=None):
+    """Create an OpenAI status error without a real HTTP response."""
+    response = Mock(status_code=status_code, headers=headers or {}, request=Mock())
+    return error_cls("error", response=response, body=None)
+
+
+class TestGetClient:
+    """Tests for creating and caching API clients."""
+    
+    @pytest.fixture
+    def model_config(self):
+        """Create an API model configuration."""
+        return ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+    
+    def test_default_clients_are_cached(self, model_config):
+        """Test equal configurations share one client without an HTTP client."""
+        assert get_client(model_config) is get_client(model_config)
+    
+    def test_clients_with_http_client_are_not_cached(self, model_config):
+        """Test clients on a caller's HTTP client are not kept alive by the cache."""
+        http_client = create_http_client()
+        try:
+            first = get_client(model_config, http_client)
+            second = get_client(model_config, http_client)
+        finally:
+            http_client.close()
+        
+        assert first is not second
+        assert first._client is http_client
+
+
+class TestCallWithRetry:
+    """Tests for retrying transient API errors."""
+    
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        """Record backoff delays instead of sleeping."""
+        delays = []
+        monkeypatch.setattr(llm.time, "sleep", delays.append)
+        return delays
+    
+    def test_retries_transient_errors(self, no_sleep):
+        """Test rate limits and timeouts are retried until a call succeeds."""
+        func = Mock(side_effect=[
+            api_error(RateLimitError, 429),
+            APITimeoutError(request=Mock()),
+            "ok",
+        ])
+        assert call_with_retry(func, "a", key="b") == "ok"
+        assert func.call_count == 3
+        func.assert_called_with("a", key="b")
+        assert len(no_sleep) == 2
+        assert all(llm.RETRY_MIN_WAIT <= d <= llm.RETRY_MAX_WAIT for d in no_sleep)
+    
+    def test_gives_up_after_max_attempts(self, no_sleep):
+        """Test the last error is raised once all attempts fail."""
+        func = Mock(side_effect=api_error(RateLimitError, 429))
+        with pytest.raises(RateLimitError):
+            call_with_retry(func)
+        assert func.call_count == llm.RETRY_ATTEMPTS
+    
+    def test_does_not_retry_other_errors(self, no_sleep):
+        """Test non-transient errors are raised immediately."""
+        func = Mock(side_effect=api_error(AuthenticationError, 401))
+        with pytest.raises(AuthenticationError):
+            call_with_retry(func)
+        assert func.call_count == 1
+        assert no_sleep == []
+    
+    def test_honours_retry_after(self, no_sleep):
+        """Test a server-requested delay replaces the backoff delay."""
+        func = Mock(side_effect=[
+            api_error(RateLimitError, 429, {"retry-after": "7"}),
+            api_error(RateLimitError, 429, {"retry-after": "3600"}),
+            "ok",
+        ])
+        assert call_with_retry(func) == "ok"
+        assert no_sleep[0] == 7.0
+        assert no_sleep[1] <= llm.RETRY_MAX_WAIT
+    
+    def test_async_retries_transient_errors(self, monkeypatch):
+        """Test the async variant retries without blocking the event loop."""
+        monkeypatch.setattr(llm.asyncio, "sleep", AsyncMock())
+        func = AsyncMock(side_effect=[api_error(RateLimitError, 429), "ok"])
+        assert asyncio.run(acall_with_retry(func, key="b")) == "ok"
+        assert func.await_count == 2
+
+
+class TestRunBatch:
+    """Tests for submitting batch jobs."""
+    
+    def test_create_calls_use_sdk_retries(self, monkeypatch):
+        """Test non-idempotent create calls are not retried by call_with_retry."""
+        monkeypatch.setattr(llm.time, "sleep", Mock())
+        client = Mock()
+        client.with_options.return_value = client
+        client.files.create.side_effect = api_error(RateLimitError, 429)
+        
+        with pytest.raises(RateLimitError):
+            run_batch(client, {"a": {"model": "gpt-4", "messages": []}})
+        
+        client.with_options.assert_called_once_with(max_retries=llm.DEFAULT_MAX_RETRIES)
+        assert client.files.create.call_count == 1
+        client.batches.create.assert_not_called()
+    
+    def test_timeout_cancels_batch(self, monkeypatch):
+        """Test a batch still running at the deadline is cancelled and fails."""
+        clock = iter(range(0, 1000, 10))
+        monkeypatch.setattr(llm.time, "monotonic", lambda: next(clock))
+        monkeypatch.setattr(llm.time, "sleep", Mock())
+        client = Mock()
+        client.with_options.return_value = client
+        client.batches.create.return_value = Mock(id="batch-1", status="in_progress")
+        client.batches.retrieve.return_value = Mock(id="batch-1", status="in_progress")
+        
+        with pytest.raises(BatchError):
+            run_batch(client, {"a": {"model": "gpt-4", "messages": []}}, timeout=30)
+        
+        client.batches.cancel.assert_called_once_with("batch-1")
+        assert client.batches.retrieve.call_count == 2
@@ -0,0 +1,308 @@
+"""Tests for TreeWriter orchestration (without actual API calls)."""
+
+import asyncio
+import json
+import threading
+import pytest
+from unittest.mock import AsyncMock, Mock
+from treewriter.orchestrator import TreeWriter
+from treewriter.config import ModelConfig, ThresholdConfig
+from treewriter.tree import WritingTree
+from treewriter.utils import GenerationError
+
+
+def build_sample_tree():
+    """Build a root with three leaf chapters."""
+    tree = WritingTree()
+    tree.add_root_node(content="Story", word_count=3000)
+    for i in range(1, 4):
+        tree.add_node(node_name=f"ch{i}", content=f"Chapter {i}", word_count=1000)
+        tree.add_edge("root", f"ch{i}")
+        tree.mark_as_leaf(f"ch{i}")
+    return tree
+
+
+class TestGenerate:
+    """Tests for the generation pipeline with mocked models."""
+    
+    @pytest.fixture
+    def writer(self):
+        """Create a TreeWriter whose models are replaced by mocks."""
+        model_config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        writer = TreeWriter(model_config, model_config, model_config, ThresholdConfig())
+        writer.planning_agent.build_tree = Mock(side_effect=lambda **kwargs: build_sample_tree())
+        writer.thinking_model.generate_outline = Mock(
+            side_effect=lambda node, tree: f"Outline for {node['content']}"
+        )
+        writer.writing_model.generate_text = Mock(
+            side_effect=lambda node, outline, tree: f"Text for {node['content']}"
+        )
+        return writer
+    
+    def test_models_share_http_client(self, writer):
+        """Test every agent's API client uses the writer's HTTP client."""
+        for model in (writer.planning_agent, writer.thinking_model, writer.writing_model):
+            assert model.client._client is writer._http_client
+    
+    def test_close_closes_http_client(self, writer):
+        """Test close() shuts down the shared connection pool."""
+        writer.close()
+        assert writer._http_client.is_closed
+    
+    def test_generate_concatenates_in_tree_order(self, writer):
+        """Test leaf texts are joined in DFS order."""
+        text = writer.generate(task="Story", word_count=3000)
+        assert text == "Text for Chapter 1\n\nText for Chapter 2\n\nText for Chapter 3"
+    
+    def test_generate_stream_matches_generate(self, writer):
+        """Test joined stream chunks equal the generate() result."""
+        chunks = list(writer.generate_stream(task="Story", word_count=3000))
+        assert len(chunks) > 1
+        assert "".join(chunks) == writer.generate(task="Story", word_count=3000)
+    
+    def test_generate_writes_leaves_concurrently(self, writer):
+        """Test text generation for independent leaves overlaps in time."""
+        barrier = threading.Barrier(3, timeout=5)
+        
+        def generate_text(node, outline, tree):
+            barrier.wait()
+            return f"Text for {node['content']}"
+        
+        writer.writing_model.generate_text = Mock(side_effect=generate_text)
+        text = writer.generate(task="Story", word_count=3000, max_concurrency=3)
+        assert text.count("Text for") == 3
+    
+    def test_generate_outlines_leaves_concurrently(self, writer):
+        """Test outline generation for independent leaves overlaps in time."""
+        barrier = threading.Barrier(3, timeout=5)
+        
+        def generate_outline(node, tree):
+            barrier.wait()
+            return f"Outline for {node['content']}"
+        
+        writer.thinking_model.generate_outline = Mock(side_effect=generate_outline)
+        text = writer.generate(task="Story", word_count=3000, max_concurrency=3)
+        assert text.count("Text for") == 3
+    
+    def test_generate_skips_failed_outlines(self, writer):
+        """Test a leaf whose outline fails gets no text."""
+        def generate_outline(node, tree):
+            if node["content"] == "Chapter 1":
+                raise GenerationError("boom", node_name="ch1", context={})
+            return f"Outline for {node['content']}"
+        
+        writer.thinking_model.generate_outline = Mock(side_effect=generate_outline)
+        text = writer.generate(task="Story", word_count=3000)
+        assert text == "Text for Chapter 2\n\nText for Chapter 3"
+    
+    def test_generate_skips_failed_leaves(self, writer):
+        """Test a failing leaf is skipped without stopping the others."""
+        def generate_text(node, outline, tree):
+            if node["content"] == "Chapter 2":
+                raise GenerationError("boom", node_name="ch2", context={})
+            return f"Text for {node['content']}"
+        
+        writer.writing_model.generate_text = Mock(side_effect=generate_text)
+        text = writer.generate(task="Story", word_count=3000)
+        assert text == "Text for Chapter 1\n\nText for Chapter 3"
+    
+    def test_generate_fuses_small_leaves(self, writer):
+        """Test small leaves get outline and text from one call."""
+        writer.fuse_word_count = 2000
+        writer.writing_model.client = Mock()
+        writer.writing_model.client.chat.completions.create.return_value = Mock(choices=[Mock(
+            message=Mock(content='```json\n{"outline": "Plan", "text": "Fused text"}\n```')
+        )])
+        
+        text = writer.generate(task="Story", word_count=3000)
+        
+        assert text == "Fused text\n\nFused text\n\nFused text"
+        assert writer.writing_model.client.chat.completions.create.call_count == 3
+        writer.thinking_model.generate_outline.assert_not_called()
+        writer.writing_model.generate_text.assert_not_called()
+    
+    def test_failed_fusion_falls_back_to_two_phases(self, writer):
+        """Test a leaf whose fused response cannot be parsed is written normally."""
+        writer.fuse_word_count = 2000
+        writer.writing_model.client = Mock()
+        writer.writing_model.client.chat.completions.create.return_value = Mock(choices=[Mock(
+            message=Mock(content="Just some prose without JSON")
+        )])
+        
+        text = writer.generate(task="Story", word_count=3000)
+        
+        assert text == "Text for Chapter 1\n\nText for Chapter 2\n\nText for Chapter 3"
+        assert writer.thinking_model.generate_outline.call_count == 3
+    
+    def test_custom_writing_template_disables_fusion(self, writer):
+        """Test small leaves use the custom template instead of the fused prompt."""
+        writer.fuse_word_count = 2000
+        writer.writing_model.fused_template = None
+        writer.writing_model.client = Mock()
+        
+        text = writer.generate(task="Story", word_count=3000)
+        
+        assert text == "Text for Chapter 1\n\nText for Chapter 2\n\nText for Chapter 3"
+        writer.writing_model.client.chat.completions.create.assert_not_called()
+
+
+class TestAgenerate:
+    """Tests for the asyncio generation pipeline with mocked models."""
+    
+    @pytest.fixture
+    def writer(self):
+        """Create a TreeWriter whose async model calls are replaced by mocks."""
+        model_config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        writer = TreeWriter(model_config, model_config, model_config, ThresholdConfig())
+        writer.planning_agent.build_tree = Mock(side_effect=lambda **kwargs: build_sample_tree())
+        writer.thinking_model.agenerate_outline = AsyncMock(
+            side_effect=lambda node, tree, client: f"Outline for {node['content']}"
+        )
+        writer.writing_model.agenerate_text = AsyncMock(
+            side_effect=lambda node, outline, tree, client: f"Text for {node['content']}"
+        )
+        return writer
+    
+    def test_agenerate_concatenates_in_tree_order(self, writer):
+        """Test async generation joins leaf texts in DFS order."""
+        text = asyncio.run(writer.agenerate(task="Story", word_count=3000))
+        assert text == "Text for Chapter 1\n\nText for Chapter 2\n\nText for Chapter 3"
+        writer.writing_model.agenerate_text.assert_awaited()
+    
+    def test_agenerate_limits_concurrency(self, writer):
+        """Test no more than max_concurrency requests are in flight."""
+        in_flight = []
+        peak = []
+        
+        async def generate_outline(node, tree, client):
+            in_flight.append(node)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(node)
+            return f"Outline for {node['content']}"
+        
+        writer.thinking_model.agenerate_outline = AsyncMock(side_effect=generate_outline)
+        text = asyncio.run(writer.agenerate(task="Story", word_count=3000, max_concurrency=2))
+        assert text.count("Text for") == 3
+        assert max(peak) == 2
+    
+    def test_agenerate_skips_failed_leaves(self, writer):
+        """Test a failing leaf is skipped without stopping the others."""
+        async def generate_text(node, outline, tree, client):
+            if node["content"] == "Chapter 2":
+                raise GenerationError("boom", node_name="ch2", context={})
+            return f"Text for {node['content']}"
+        
+        writer.writing_model.agenerate_text = AsyncMock(side_effect=generate_text)
+        text = asyncio.run(writer.agenerate(task="Story", word_count=3000))
+        assert text == "Text for Chapter 1\n\nText for Chapter 3"
+    
+    def test_agenerate_failed_fusion_falls_back_to_two_phases(self, writer):
+        """Test async fusion falls back to separate calls like the sync path."""
+        async def generate_outline_and_text(node, tree, client):
+            if node["content"] == "Chapter 2":
+                raise GenerationError("bad JSON", node_name="ch2", context={})
+            return "Plan", f"Fused {node['content']}"
+        
+        writer.fuse_word_count = 2000
+        writer.writing_model.agenerate_outline_and_text = AsyncMock(side_effect=generate_outline_and_text)
+        text = asyncio.run(writer.agenerate(task="Story", word_count=3000))
+        
+        assert text == "Fused Chapter 1\n\nText for Chapter 2\n\nFused Chapter 3"
+        assert writer.thinking_model.agenerate_outline.await_count == 1
+
+
+def make_batch_client(status="completed", failed_ids=()):
+    """Create a mock client that answers batch jobs from their input file."""
+    client = Mock()
+    client.with_options.return_value = client
+    uploads = {}
+    
+    def create_file(file, purpose):
+        file_id = f"file-{len(uploads)}"
+        uploads[file_id] = file[1].decode("utf-8")
+        return Mock(id=file_id)
+    
+    def create_batch(input_file_id, endpoint, completion_window):
+        return Mock(id="batch-1", status=status, output_file_id=f"out-{input_file_id}")
+    
+    def file_content(file_id):
+        lines = []
+        for line in uploads[file_id[len("out-"):]].splitlines():
+            request = json.loads(line)
+            custom_id = request["custom_id"]
+            if custom_id in failed_ids:
+                response = {"status_code": 500, "body": {}}
+            else:
+                content = f"Batch {custom_id}"
+                response = {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}
+            lines.append(json.dumps({"custom_id": custom_id, "response": response}))
+        return Mock(text="\n".join(lines))
+    
+    client.files.create.side_effect = create_file
+    client.batches.create.side_effect = create_batch
+    client.files.content.side_effect = file_content
+    return client
+
+
+class TestBatchGenerate:
+    """Tests for batch submission of outline and text requests."""
+    
+    @pytest.fixture
+    def writer(self):
+        """Create a batch-mode TreeWriter with mocked models and client."""
+        model_config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        writer = TreeWriter(
+            model_config, model_config, model_config, ThresholdConfig(), use_batch_api=True
+        )
+        writer.planning_agent.build_tree = Mock(side_effect=lambda **kwargs: build_sample_tree())
+        writer.thinking_model.generate_outline = Mock(
+            side_effect=lambda node, tree: f"Outline for {node['content']}"
+        )
+        writer.writing_model.generate_text = Mock(
+            side_effect=lambda node, outline, tree: f"Text for {node['content']}"
+        )
+        return writer
+    
+    def test_batch_results_fill_tree(self, writer):
+        """Test both phases are answered by batch jobs."""
+        client = make_batch_client()
+        writer.thinking_model.client = writer.writing_model.client = client
+        
+        text = writer.generate(task="Story", word_count=3000)
+        
+        assert text == "Batch ch1\n\nBatch ch2\n\nBatch ch3"
+        assert client.batches.create.call_count == 2
+        writer.thinking_model.generate_outline.assert_not_called()
+        writer.writing_model.generate_text.assert_not_called()
+    
+    def test_failed_batch_falls_back_to_per_leaf(self, writer):
+        """Test a batch that does not complete falls back to per-leaf requests."""
+        writer.thinking_model.client = writer.writing_model.client = make_batch_client(status="failed")
+        
+        text = writer.generate(task="Story", word_count=3000)
+        
+        assert text == "Text for Chapter 1\n\nText for Chapter 2\n\nText for Chapter 3"
+    
+    def test_missing_batch_results_fall_back_per_leaf(self, writer):
+        """Test leaves whose batch request failed are generated individually."""
+        writer.thinking_model.client = writer.writing_model.client = make_batch_client(failed_ids=("ch2",))
+        
+        text = writer.generate(task="Story", word_count=3000)
+        
+        assert text == "Batch ch1\n\nText for Chapter 2\n\nBatch ch3"
@@ -1,7 +1,12 @@
 """Tests for PlanningAgent."""
 
+import dataclasses
+import json
+import sqlite3
+import threading
 import pytest
 from unittest.mock import Mock, patch
+from treewriter.cache import PlanCache
 from treewriter.planning import PlanningAgent
 from treewriter.config import ModelConfig, ThresholdConfig
 from treewriter.tree import WritingTree
@@ -46,6 +51,18 @@ class TestPlanningAgentInit:
         with pytest.raises(ConfigurationError):
             PlanningAgent(model_config, threshold_config)
     
+    def test_init_with_invalid_prompt_template(self):
+        """Test a malformed custom template raises error at init."""
+        model_config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        
+        with pytest.raises(ConfigurationError, match="Invalid prompt template"):
+            PlanningAgent(model_config, ThresholdConfig(), prompt_template="Plan {content")
+    
     def test_init_with_local_model_not_implemented(self):
         """Test initializing with local model raises NotImplementedError."""
         model_config = ModelConfig(
@@ -101,6 +118,16 @@ class TestThresholdCheck:
         """Test threshold check at maximum boundary."""
         node = {"word_count": 5000}
         assert agent.should_decompose_threshold(node) is True
+    
+    @pytest.mark.parametrize("word_count, expected", [
+        (500, "skip"),
+        (1000, "ask"),
+        (5000, "ask"),
+        (6000, "force"),
+    ])
+    def test_threshold_decision(self, agent, word_count, expected):
+        """Test the tri-state threshold decision."""
+        assert agent.threshold_decision({"word_count": word_count}) == expected
 
 
 class TestParseAgentResponse:
@@ -157,6 +184,198 @@ class TestParseAgentResponse:
 That's my analysis.'''
         result = agent._parse_agent_response(response)
         assert result["should_decompose"] is True
+    
+    def test_parse_nested_json_with_braces_in_strings(self, agent):
+        """Test nested objects and braces or quotes inside strings."""
+        response = (
+            'Decision: {"should_decompose": true, "reasoning": "Uses \\"{acts}\\" }", '
+            '"children": [{"content": "A {b}", "word_count": 1}]} trailing }'
+        )
+        result = agent._parse_agent_response(response)
+        assert result["reasoning"] == 'Uses "{acts}" }'
+        assert result["children"] == [{"content": "A {b}", "word_count": 1}]
+    
+    def test_parse_prefers_fenced_json(self, agent):
+        """Test a ```json block is used even if braces appear before it."""
+        response = 'Format: {...}\n```json\n{"should_decompose": true, "reasoning": "ok"}\n```'
+        assert agent._parse_agent_response(response)["reasoning"] == "ok"
+    
+    def test_parse_truncated_json(self, agent):
+        """Test an unterminated object defaults to no decomposition."""
+        result = agent._parse_agent_response('{"should_decompose": true, "children": [')
+        assert result["should_decompose"] is False
+
+
+class TestBuildMessages:
+    """Tests for splitting planning prompts into system and user messages."""
+    
+    @pytest.fixture
+    def model_config(self):
+        """Create an API model configuration."""
+        return ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+    
+    def test_system_message_is_shared(self, model_config):
+        """Test the system message is identical for different nodes."""
+        agent = PlanningAgent(model_config, ThresholdConfig(max_word_count=4321))
+        first = agent._build_messages({"content": "Chapter 1", "word_count": 3000})
+        second = agent._build_messages({"content": "Chapter 2", "word_count": 2000})
+        
+        assert [m["role"] for m in first] == ["system", "user"]
+        assert first[0] == second[0]
+        assert "4321" in first[0]["content"]
+        assert "Chapter 1" in first[1]["content"]
+        assert "Chapter 1" not in first[0]["content"]
+    
+    def test_custom_template_is_single_user_message(self, model_config):
+        """Test a custom template is sent as one user message."""
+        agent = PlanningAgent(
+            model_config,
+            ThresholdConfig(),
+            prompt_template="Plan {content} in {max_children} parts"
+        )
+        messages = agent._build_messages({"content": "Story", "word_count": 3000})
+        
+        assert messages == [{"role": "user", "content": "Plan Story in 5 parts"}]
+
+
+class TestDecisionCache:
+    """Tests for memoizing planning agent decisions (without actual API calls)."""
+    
+    DECISION = {
+        "should_decompose": True,
+        "reasoning": "Long story",
+        "children": [
+            {"content": "Part 1", "word_count": 1000},
+            {"content": "Part 2", "word_count": 1000},
+        ],
+    }
+    
+    def make_agent(self, threshold_config=None, response_text=None):
+        """Create a planning agent whose client returns a fixed response."""
+        model_config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        agent = PlanningAgent(model_config, threshold_config or ThresholdConfig())
+        agent.client = Mock()
+        agent.client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content=response_text or json.dumps(self.DECISION)))]
+        )
+        return agent
+    
+    def make_tree(self):
+        """Create a tree with a single 3000-word root."""
+        tree = WritingTree()
+        tree.add_root_node(content="Story", word_count=3000)
+        return tree
+    
+    def test_decompose_node_decides_in_one_call(self):
+        """Test the decision and the children come from a single API call."""
+        agent = self.make_agent()
+        tree = self.make_tree()
+        
+        should_decompose, reasoning, children = agent.decompose_node("root", tree)
+        
+        assert should_decompose is True
+        assert reasoning == "Long story"
+        assert agent.client.chat.completions.create.call_count == 1
+        # Word counts are rescaled on the returned copy, not in the cache
+        assert [child["word_count"] for child in children] == [1500, 1500]
+        _, _, children = agent.decompose_node("root", tree)
+        assert [child["word_count"] for child in children] == [1500, 1500]
+        assert agent.client.chat.completions.create.call_count == 1
+    
+    def test_decompose_node_rounds_float_word_counts(self):
+        """Test float word counts are rounded and rescaled instead of failing."""
+        decision = {
+            "should_decompose": True,
+            "reasoning": "Long story",
+            "children": [
+                {"content": "Part 1", "word_count": 1000.0},
+                {"content": "Part 2", "word_count": 1000.5},
+            ],
+        }
+        agent = self.make_agent(response_text=json.dumps(decision))
+        
+        _, _, children = agent.decompose_node("root", self.make_tree())
+        
+        assert [child["word_count"] for child in children] == [1500, 1500]
+    
+    def test_decompose_node_declined(self):
+        """Test a declined decomposition returns no children."""
+        agent = self.make_agent(response_text=json.dumps({"should_decompose": False, "reasoning": "Small"}))
+        tree = self.make_tree()
+        
+        assert agent.decompose_node("root", tree) == (False, "Small", [])
+    
+    def test_decompose_node_uses_given_node(self):
+        """Test a pre-fetched node is used instead of looking it up again."""
+        agent = self.make_agent()
+        tree = self.make_tree()
+        node = tree.get_node("root")
+        
+        with patch.object(tree, "get_node", side_effect=AssertionError("node looked up")):
+            _, _, children = agent.decompose_node("root", tree, node=node)
+        
+        assert len(children) == 2
+    
+    def test_unparseable_response_is_not_cached(self):
+        """Test a response without JSON is requested again next time."""
+        agent = self.make_agent(response_text="no JSON here")
+        tree = self.make_tree()
+        
+        for _ in range(2):
+            should_decompose, _ = agent.should_decompose_agent(tree.get_node("root"), tree)
+            assert should_decompose is False
+        
+        assert agent.client.chat.completions.create.call_count == 2
+    
+    def test_decisions_persist_across_agents(self, tmp_path):
+        """Test a persistent decision cache is shared by later agents."""
+        threshold_config = ThresholdConfig(decision_cache_path=str(tmp_path / "decisions.sqlite3"))
+        tree = self.make_tree()
+        
+        first = self.make_agent(threshold_config)
+        first.should_decompose_agent(tree.get_node("root"), tree)
+        
+        second = self.make_agent(threshold_config)
+        should_decompose, reasoning = second.should_decompose_agent(tree.get_node("root"), tree)
+        
+        assert (should_decompose, reasoning) == (True, "Long story")
+        second.client.chat.completions.create.assert_not_called()
+    
+    def test_stored_decisions_depend_on_sampling_settings(self, tmp_path):
+        """Test a stored decision is not reused after the temperature changes."""
+        threshold_config = ThresholdConfig(decision_cache_path=str(tmp_path / "decisions.sqlite3"))
+        tree = self.make_tree()
+        
+        self.make_agent(threshold_config).should_decompose_agent(tree.get_node("root"), tree)
+        
+        second = self.make_agent(threshold_config)
+        second.model_config = dataclasses.replace(second.model_config, temperature=0.2)
+        second.should_decompose_agent(tree.get_node("root"), tree)
+        
+        second.client.chat.completions.create.assert_called_once()
+    
+    def test_failing_decision_store_does_not_change_plan(self):
+        """Test SQLite errors in the decision store are bypassed."""
+        agent = self.make_agent()
+        agent.decision_store = Mock()
+        agent.decision_store.get.side_effect = sqlite3.OperationalError("database is locked")
+        agent.decision_store.put.side_effect = sqlite3.OperationalError("database is locked")
+        
+        should_decompose, _, children = agent.decompose_node("root", self.make_tree())
+        
+        assert should_decompose is True
+        assert len(children) == 2
+        agent.decision_store.put.assert_called_once()
 
 
 class TestBuildTree:
@@ -193,3 +412,385 @@ class TestBuildTree:
         assert root["content"] == "Write a story"
         assert root["word_count"] == 500
         assert root["theme"] == "Adventure"
+
+
+class TestExpandNodes:
+    """Tests for level-by-level tree expansion (without actual API calls)."""
+    
+    @pytest.fixture
+    def agent(self):
+        """Create a planning agent whose decisions are mocked per node."""
+        model_config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        return PlanningAgent(model_config, ThresholdConfig(min_word_count=1000, max_word_count=5000))
+    
+    def test_siblings_are_planned_concurrently(self, agent):
+        """Test nodes at the same depth are expanded in parallel."""
+        barrier = threading.Barrier(3, timeout=5)
+        
+        parts = [{"content": f"Part {i}", "word_count": 3000} for i in range(1, 4)]
+        
+        def decompose_node(node_name, tree, node):
+            if node["content"] == "Story":
+                return True, "Split into parts", parts
+            barrier.wait()
+            return False, "Small enough", []
+        
+        with patch.object(agent, "decompose_node", side_effect=decompose_node):
+            tree = agent.build_tree(root_task="Story", word_count=9000, max_concurrency=3)
+        
+        assert tree.get_children("root") == ("root_child1", "root_child2", "root_child3")
+        assert tree.get_leaf_nodes() == ["root_child1", "root_child2", "root_child3"]
+    
+    def test_forced_decomposition_ignores_agent_decision(self, agent):
+        """Test nodes above max_word_count are decomposed even if the agent declines."""
+        parts = [{"content": "Half", "word_count": 3000}, {"content": "Half", "word_count": 3000}]
+        with patch.object(agent, "decompose_node", return_value=(False, "Small", parts)) as decompose:
+            tree = agent.build_tree(root_task="Story", word_count=6000)
+        
+        root = tree.get_node("root")
+        assert root["decompose_threshold_decision"] == "force"
+        assert root["decompose_agent_decision"] is None
+        assert tree.get_children("root") == ("root_child1", "root_child2")
+        # One call per node; the in-range children follow the agent's decision
+        assert decompose.call_count == 3
+        child = tree.get_node("root_child1")
+        assert child["decompose_threshold_decision"] == "ask"
+        assert child["decompose_agent_decision"] is False
+        assert tree.get_leaf_nodes() == ["root_child1", "root_child2"]
+    
+    def respond_with(self, agent, *decisions):
+        """Make the mocked client answer successive completions with decisions."""
+        agent.client = Mock()
+        agent.client.chat.completions.create.side_effect = [
+            Mock(choices=[Mock(message=Mock(content=json.dumps(decision)))])
+            for decision in decisions
+        ]
+    
+    def test_forced_node_without_children_is_asked_again(self, agent):
+        """Test a forced node the agent declines is re-asked as mandatory."""
+        parts = [{"content": "Half", "word_count": 3000}, {"content": "Half", "word_count": 3000}]
+        self.respond_with(
+            agent,
+            {"should_decompose": False},
+            {"should_decompose": True, "children": parts},
+            {"should_decompose": False},
+            {"should_decompose": False},
+        )
+        
+        tree = agent.build_tree(root_task="Story", word_count=6000, max_concurrency=1)
+        
+        assert tree.get_children("root") == ("root_child1", "root_child2")
+        calls = agent.client.chat.completions.create.call_args_list
+        first, second = calls[0].kwargs["messages"], calls[1].kwargs["messages"]
+        assert second[:-1] == first
+        assert second[-1]["role"] == "user"
+        assert "6000" in second[-1]["content"] and "5000" in second[-1]["content"]
+    
+    def test_forced_node_declined_twice_becomes_leaf(self, agent):
+        """Test the mandatory re-ask is made only once."""
+        self.respond_with(agent, {"should_decompose": False}, {"should_decompose": False})
+        
+        tree = agent.build_tree(root_task="Story", word_count=6000)
+        
+        assert agent.client.chat.completions.create.call_count == 2
+        assert tree.get_leaf_nodes() == ["root"]
+    
+    def test_max_depth_marks_leaves(self, agent):
+        """Test expansion stops at max_depth."""
+        parts = [{"content": "Half", "word_count": 6000}, {"content": "Half", "word_count": 6000}]
+        with patch.object(agent, "decompose_node", return_value=(True, "Split", parts)):
+            tree = agent.build_tree(root_task="Story", word_count=12000, max_depth=2)
+        
+        assert len(tree) == 7
+        assert all(name.count("_child") == 2 for name in tree.get_leaf_nodes())
+
+
+class TestBuildTreeOneshot:
+    """Tests for single-call tree planning (without actual API calls)."""
+    
+    @pytest.fixture
+    def agent(self):
+        """Create a planning agent with a mocked client."""
+        model_config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        agent = PlanningAgent(model_config, ThresholdConfig(min_word_count=1000, max_word_count=5000))
+        agent.client = Mock()
+        return agent
+    
+    def respond_with(self, agent, text):
+        """Make the mocked client answer every chat completion with text."""
+        agent.client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content=text))]
+        )
+    
+    def test_builds_nested_tree_with_one_call(self, agent):
+        """Test the whole nested plan is added from a single completion."""
+        plan = {
+            "content": "Story",
+            "word_count": 12000,
+            "children": [
+                {"content": "Part 1", "word_count": 8000, "children": [
+                    {"content": "Chapter 1", "word_count": 4000, "children": []},
+                    {"content": "Chapter 2", "word_count": 4000, "children": []},
+                ]},
+                {"content": "Part 2", "word_count": 4000, "theme": "Loss", "children": []},
+            ],
+        }
+        self.respond_with(agent, f"```json\n{json.dumps(plan)}\n```")
+        
+        tree = agent.build_tree_oneshot(root_task="Story", word_count=12000, theme="Hope")
+        
+        assert agent.client.chat.completions.create.call_count == 1
+        assert list(tree.traverse_dfs()) == [
+            "root", "root_child1", "root_child1_child1", "root_child1_child2", "root_child2"
+        ]
+        assert sorted(tree.get_leaf_nodes()) == ["root_child1_child1", "root_child1_child2", "root_child2"]
+        assert tree.get_node("root_child1_child1")["theme"] == "Hope"
+        assert tree.get_node("root_child2")["theme"] == "Loss"
+    
+    def test_oversized_leaf_is_decomposed_again(self, agent):
+        """Test only a leaf above twice max_word_count is re-planned recursively."""
+        plan = {
+            "content": "Story",
+            "word_count": 16000,
+            "children": [
+                {"content": "Part 1", "word_count": 4000, "children": []},
+                {"content": "Part 2", "word_count": 12000, "children": []},
+            ],
+        }
+        self.respond_with(agent, json.dumps(plan))
+        
+        with patch.object(agent, "_expand_nodes") as process_node:
+            tree = agent.build_tree_oneshot(root_task="Story", word_count=16000)
+        
+        process_node.assert_called_once_with([("root_child2", 1)], tree, 10, 8)
+        assert tree.get_node("root_child1")["node_type"] == "leaf"
+    
+    def test_invalid_plan_falls_back_to_recursive(self, agent):
+        """Test an unusable response falls back to recursive planning."""
+        self.respond_with(agent, "I cannot plan this")
+        
+        with patch.object(agent, "_expand_nodes") as process_node:
+            tree = agent.build_tree_oneshot(root_task="Story", word_count=16000)
+        
+        process_node.assert_called_once_with([("root", 0)], tree, 10, 8)
+    
+    def test_plan_levels_are_validated(self, agent):
+        """Test each plan level is truncated and rescaled against its parent."""
+        plan = {
+            "content": "Story",
+            "word_count": 12000,
+            "children": [
+                {"content": "Part 1", "word_count": 3000, "children": [
+                    {"content": f"Chapter {i}", "word_count": 1000, "children": []}
+                    for i in range(1, 8)
+                ]},
+                {"content": "Part 2", "word_count": 3000, "children": [
+                    {"content": "Only chapter", "word_count": 3000, "children": []},
+                ]},
+            ],
+        }
+        self.respond_with(agent, json.dumps(plan))
+        
+        tree = agent.build_tree_oneshot(root_task="Story", word_count=12000)
+        
+        assert tree.get_node("root_child1")["word_count"] == 6000
+        assert tree.get_node("root_child2")["word_count"] == 6000
+        chapters = tree.get_children("root_child1")
+        assert len(chapters) == agent.threshold_config.max_children
+        assert sum(tree.get_node(c)["word_count"] for c in chapters) == 6000
+        assert tree.get_children("root_child2") == ()
+        assert tree.get_node("root_child2")["node_type"] == "leaf"
+    
+    def test_each_plan_level_is_validated_once(self, agent):
+        """Test the top level is not validated again while adding nodes."""
+        plan = {
+            "content": "Story",
+            "word_count": 12000,
+            "children": [
+                {"content": f"Part {i}", "word_count": 2000, "children": []}
+                for i in range(1, 8)
+            ],
+        }
+        self.respond_with(agent, json.dumps(plan))
+        
+        with patch.object(agent, "_validate_children", wraps=agent._validate_children) as validate:
+            tree = agent.build_tree_oneshot(root_task="Story", word_count=12000)
+        
+        validate.assert_called_once()
+        assert len(tree.get_children("root")) == agent.threshold_config.max_children
+    
+    def test_rejected_top_level_falls_back_to_recursive(self, agent):
+        """Test a plan with too few top-level children is not used."""
+        plan = {
+            "content": "Story",
+            "word_count": 16000,
+            "children": [{"content": "Everything", "word_count": 16000, "children": []}],
+        }
+        self.respond_with(agent, json.dumps(plan))
+        
+        with patch.object(agent, "_expand_nodes") as process_node:
+            tree = agent.build_tree_oneshot(root_task="Story", word_count=16000)
+        
+        process_node.assert_called_once_with([("root", 0)], tree, 10, 8)
+        assert tree.get_children("root") == ()
+    
+    def test_small_task_makes_no_call(self, agent):
+        """Test a root below the threshold becomes a leaf without a call."""
+        tree = agent.build_tree_oneshot(root_task="Story", word_count=500)
+        
+        agent.client.chat.completions.create.assert_not_called()
+        assert tree.get_leaf_nodes() == ["root"]
+
+
+class TestPlanCache:
+    """Tests for reusing cached plans (without actual API calls)."""
+    
+    CACHED_PLAN = {
+        "content": "Write a story",
+        "word_count": 3000,
+        "children": [
+            {"content": "Beginning", "word_count": 1500, "children": []},
+            {"content": "Ending", "word_count": 1500, "children": []},
+        ],
+    }
+    
+    @pytest.fixture
+    def agent(self, tmp_path):
+        """Create a planning agent with an empty plan cache and mocked client."""
+        model_config = ModelConfig(
+            model_type="api",
+            api_key="test_key",
+            api_endpoint="https://api.example.com",
+            model_name="gpt-4"
+        )
+        threshold_config = ThresholdConfig(plan_cache_enabled=True)
+        agent = PlanningAgent(
+            model_config,
+            threshold_config,
+            plan_cache=PlanCache(str(tmp_path / "plans.sqlite3"))
+        )
+        agent.client = Mock()
+        agent.client.embeddings.create.return_value = Mock(data=[Mock(embedding=[1.0, 0.0])])
+        return agent
+    
+    def test_cache_lookup_threshold(self, tmp_path):
+        """Test lookups only return plans above the similarity threshold."""
+        cache = PlanCache(str(tmp_path / "plans.sqlite3"))
+        cache.store("goal", [1.0, 0.0], self.CACHED_PLAN)
+        
+        assert len(cache) == 1
+        similarity, plan = cache.lookup([1.0, 0.1], 0.9)
+        assert similarity > 0.99
+        assert plan == self.CACHED_PLAN
+        assert cache.lookup([0.0, 1.0], 0.9) is None
+    
+    def test_cache_hit_adapts_plan(self, agent):
+        """Test a similar cached plan is adapted instead of decomposing."""
+        agent.plan_cache.store("goal", [1.0, 0.0], self.CACHED_PLAN)
+        adapted = {
+            "content": "Write a new story",
+            "word_count": 3000,
+            "children": [
+                {"content": "New beginning", "word_count": 1000, "children": []},
+                {"content": "New ending", "word_count": 2000, "children": []},
+            ],
+        }
+        agent.client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content=f"```json\n{json.dumps(adapted)}\n```"))]
+        )
+        
+        with patch.object(agent, "decompose_node") as decompose:
+            tree = agent.build_tree(root_task="Write a new story", word_count=3000)
+        
+        decompose.assert_not_called()
+        assert agent.client.chat.completions.create.call_count == 1
+        assert tree.get_children("root") == ("root_child1", "root_child2")
+        assert tree.get_node("root_child2")["word_count"] == 2000
+        assert tree.get_leaf_nodes() == ["root_child1", "root_child2"]
+    
+    def test_cache_miss_stores_plan(self, agent):
+        """Test a freshly planned tree is stored in the cache."""
+        def process_node(frontier, tree, max_depth, max_concurrency):
+            agent._add_children("root", self.CACHED_PLAN["children"], tree)
+        
+        with patch.object(agent, "_expand_nodes", side_effect=process_node):
+            agent.build_tree(root_task="Write a story", word_count=3000)
+        
+        assert len(agent.plan_cache) == 1
+        _, plan = agent.plan_cache.lookup([1.0, 0.0], 0.9)
+        assert plan == self.CACHED_PLAN
+    
+    def test_invalid_adapted_plan_falls_back(self, agent):
+        """Test an unparseable adaptation falls back to normal planning."""
+        agent.plan_cache.store("goal", [1.0, 0.0], self.CACHED_PLAN)
+        agent.client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content="not a plan"))]
+        )
+        
+        with patch.object(agent, "_expand_nodes") as process_node:
+            agent.build_tree(root_task="Write a story", word_count=3000)
+        
+        process_node.assert_called_once()
+    
+    def test_adapted_plan_is_rescaled(self, agent):
+        """Test adapted plan levels are rescaled to their parent's word count."""
+        agent.plan_cache.store("goal", [1.0, 0.0], self.CACHED_PLAN)
+        adapted = {
+            "content": "Write a new story",
+            "word_count": 3000,
+            "children": [
+                {"content": "New beginning", "word_count": 500, "children": []},
+                {"content": "New ending", "word_count": 1000, "children": [
+                    {"content": "Climax", "word_count": 300, "children": []},
+                    {"content": "Resolution", "word_count": 100, "children": []},
+                ]},
+            ],
+        }
+        agent.client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content=json.dumps(adapted)))]
+        )
+        
+        tree = agent.build_tree(root_task="Write a new story", word_count=3000)
+        
+        assert tree.get_node("root_child1")["word_count"] == 1000
+        assert tree.get_node("root_child2")["word_count"] == 2000
+        assert tree.get_node("root_child2_child1")["word_count"] == 1500
+        assert tree.get_node("root_child2_child2")["word_count"] == 500
+    
+    def test_adapted_plan_with_too_few_children_falls_back(self, agent):
+        """Test a plan whose top level fails validation is not used."""
+        agent.plan_cache.store("goal", [1.0, 0.0], self.CACHED_PLAN)
+        adapted = {
+            "content": "Write a new story",
+            "word_count": 3000,
+            "children": [{"content": "Everything", "word_count": 3000, "children": []}],
+        }
+        agent.client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content=json.dumps(adapted)))]
+        )
+        
+        with patch.object(agent, "_expand_nodes") as process_node:
+            tree = agent.build_tree(root_task="Write a new story", word_count=3000)
+        
+        process_node.assert_called_once()
+        assert tree.get_children("root") == ()
+    
+    def test_root_below_threshold_skips_cache(self, agent):
+        """Test a root too short to decompose never reaches the plan cache."""
+        agent.plan_cache.store("goal", [1.0, 0.0], self.CACHED_PLAN)
+        
+        tree = agent.build_tree(root_task="Write a short story", word_count=500)
+        
+        agent.client.embeddings.create.assert_not_called()
+        agent.client.chat.completions.create.assert_not_called()
+        assert tree.get_leaf_nodes() == ["root"]
@@ -2,10 +2,16 @@
 
 import pytest
 from treewriter.prompts import (
+    compile_template,
     format_template,
     get_planning_prompt,
     get_thinking_prompt,
     get_writing_prompt,
+    get_unspecified,
+    node_prompt_vars,
+    NODE_PROMPT_FIELDS,
+    UNSPECIFIED_CN,
+    UNSPECIFIED_EN,
     PLANNING_PROMPT_CN,
     THINKING_PROMPT_CN,
     WRITING_PROMPT_CN,
@@ -52,6 +58,56 @@ class TestFormatTemplate:
         assert result == "Value: None"
 
 
+class TestCompileTemplate:
+    """Tests for precompiled templates."""
+    
+    def test_matches_format_template(self):
+        """Test compiled templates format like format_template."""
+        values = {"name": "Alice", "age": 30, "city": "NYC"}
+        template = "Hello {name}, you are {age} years old."
+        assert compile_template(template)(values) == format_template(template, **values)
+    
+    def test_missing_variable(self):
+        """Test a missing variable raises error."""
+        render = compile_template("Hello {name}, you are {age} years old.")
+        with pytest.raises(ValueError, match="Missing required variables: age"):
+            render({"name": "Alice"})
+    
+    def test_invalid_template(self):
+        """Test an unbalanced brace is rejected when compiling."""
+        with pytest.raises(ValueError, match="Invalid template"):
+            compile_template("Hello {name")
+
+
+class TestNodePromptVars:
+    """Tests for collecting node prompt variables."""
+    
+    def test_unset_fields_are_unspecified(self):
+        """Test missing and None fields render as the Chinese placeholder by default."""
+        prompt_vars = node_prompt_vars({"content": "Story", "word_count": 3000, "theme": None})
+        assert prompt_vars["content"] == "Story"
+        assert prompt_vars["word_count"] == 3000
+        assert prompt_vars["character_list"] == "[]"
+        assert all(prompt_vars[field] == UNSPECIFIED_CN for field in NODE_PROMPT_FIELDS)
+    
+    def test_set_fields_are_kept(self):
+        """Test given fields override the defaults."""
+        prompt_vars = node_prompt_vars({"theme": "Courage", "character_list": ["Ella"]})
+        assert prompt_vars["theme"] == "Courage"
+        assert prompt_vars["character_list"] == '["Ella"]'
+        assert prompt_vars["story_setting"] == UNSPECIFIED_CN
+    
+    def test_unspecified_placeholder_follows_language(self):
+        """Test English prompts get an English placeholder."""
+        prompt_vars = node_prompt_vars({"content": "Story"}, get_unspecified("en"))
+        assert prompt_vars["writing_tone"] == UNSPECIFIED_EN == "Not specified"
+    
+    def test_character_list_is_json(self):
+        """Test the character list renders as JSON without escaping CJK text."""
+        prompt_vars = node_prompt_vars({"character_list": ["艾拉", "老树精"]})
+        assert prompt_vars["character_list"] == '["艾拉","老树精"]'
+
+
 class TestGetPrompts:
     """Tests for getting prompt templates."""
     
@@ -0,0 +1,55 @@
+"""Tests for the thinking model (without actual API calls)."""
+
+from treewriter.thinking import ThinkingModel
+from treewriter.tree import WritingTree
+
+
+def build_story_tree():
+    """Build a root with two leaf chapters that set their own fields."""
+    tree = WritingTree()
+    tree.add_root_node(content="Story", word_count=2000, theme="Courage", character_list=["Ella"])
+    for i in range(1, 3):
+        tree.add_node(
+            node_name=f"ch{i}",
+            content=f"Chapter {i}",
+            word_count=1000,
+            theme="Courage",
+            writing_goals=f"Goal {i}"
+        )
+        tree.add_edge("root", f"ch{i}")
+        tree.mark_as_leaf(f"ch{i}")
+    return tree
+
+
+class TestBuildRequest:
+    """Tests for building outline requests."""
+    
+    def test_story_context_is_shared_system_message(self, sample_model_config):
+        """Test every leaf gets the same system message and its own user message."""
+        model = ThinkingModel(sample_model_config, language="en")
+        tree = build_story_tree()
+        
+        first, second = (
+            model.build_request(tree.get_node(name), tree)["messages"]
+            for name in ("ch1", "ch2")
+        )
+        
+        assert first[0]["role"] == "system"
+        assert first[0] == second[0]
+        assert "Story" in first[0]["content"]
+        assert "Courage" in first[0]["content"]
+        assert '["Ella"]' in first[0]["content"]
+        assert first[1]["role"] == "user"
+        assert "Chapter 1" in first[1]["content"] and "Goal 1" in first[1]["content"]
+        assert "Chapter 2" in second[1]["content"]
+        assert "未指定" not in first[0]["content"] + first[1]["content"]
+        assert "Writing tone: Not specified" in first[0]["content"]
+    
+    def test_custom_template_is_single_user_message(self, sample_model_config):
+        """Test a custom template is sent as one user message."""
+        model = ThinkingModel(sample_model_config, prompt_template="Outline {content} of {root_content}")
+        tree = build_story_tree()
+        
+        messages = model.build_request(tree.get_node("ch1"), tree)["messages"]
+        
+        assert messages == [{"role": "user", "content": "Outline Chapter 1 of Story"}]
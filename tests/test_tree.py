@@ -1,10 +1,32 @@
 """Tests for WritingTree data structure."""
 
+import copy
+import re
 import pytest
 from treewriter.tree import WritingTree
 from treewriter.utils import TreeStructureError
 
 
+# Error messages raised by WritingTree, shared across tests
+ALREADY_EXISTS = re.compile("already exists")
+DOES_NOT_EXIST = re.compile("does not exist")
+
+
+@pytest.fixture(scope="class")
+def branching_tree():
+    """Root with two chapter children, shared by the tests of a class.
+    
+    Tests must not modify this tree; take copy.deepcopy() of it first.
+    """
+    tree = WritingTree()
+    tree.add_root_node(content="Story", word_count=5000)
+    tree.add_node(node_name="ch1", content="Chapter 1", word_count=2000)
+    tree.add_node(node_name="ch2", content="Chapter 2", word_count=3000)
+    tree.add_edge("root", "ch1")
+    tree.add_edge("root", "ch2")
+    return tree
+
+
 class TestWritingTreeBasics:
     """Basic tests for WritingTree."""
     
@@ -35,7 +57,7 @@ class TestWritingTreeBasics:
         tree = WritingTree()
         tree.add_root_node(content="Story 1", word_count=1000)
         
-        with pytest.raises(TreeStructureError, match="already exists"):
+        with pytest.raises(TreeStructureError, match=ALREADY_EXISTS):
             tree.add_root_node(content="Story 2", word_count=2000)
     
     def test_add_child_node(self):
@@ -63,7 +85,7 @@ class TestWritingTreeBasics:
         tree.add_root_node(content="Story", word_count=1000)
         tree.add_node(node_name="node1", content="Content", word_count=500)
         
-        with pytest.raises(TreeStructureError, match="already exists"):
+        with pytest.raises(TreeStructureError, match=ALREADY_EXISTS):
             tree.add_node(node_name="node1", content="Different", word_count=300)
 
 
@@ -86,7 +108,7 @@ class TestWritingTreeEdges:
         tree = WritingTree()
         tree.add_node(node_name="ch1", content="Chapter 1", word_count=1000)
         
-        with pytest.raises(TreeStructureError, match="does not exist"):
+        with pytest.raises(TreeStructureError, match=DOES_NOT_EXIST):
             tree.add_edge("nonexistent", "ch1")
     
     def test_add_edge_nonexistent_child(self):
@@ -94,19 +116,12 @@ class TestWritingTreeEdges:
         tree = WritingTree()
         tree.add_root_node(content="Story", word_count=1000)
         
-        with pytest.raises(TreeStructureError, match="does not exist"):
+        with pytest.raises(TreeStructureError, match=DOES_NOT_EXIST):
             tree.add_edge("root", "nonexistent")
     
-    def test_get_children(self):
+    def test_get_children(self, branching_tree):
         """Test getting children of a node."""
-        tree = WritingTree()
-        tree.add_root_node(content="Story", word_count=5000)
-        tree.add_node(node_name="ch1", content="Chapter 1", word_count=2000)
-        tree.add_node(node_name="ch2", content="Chapter 2", word_count=3000)
-        tree.add_edge("root", "ch1")
-        tree.add_edge("root", "ch2")
-        
-        children = tree.get_children("root")
+        children = branching_tree.get_children("root")
         assert len(children) == 2
         assert "ch1" in children
         assert "ch2" in children
@@ -115,7 +130,7 @@ class TestWritingTreeEdges:
         """Test getting children of nonexistent node raises error."""
         tree = WritingTree()
         
-        with pytest.raises(TreeStructureError, match="does not exist"):
+        with pytest.raises(TreeStructureError, match=DOES_NOT_EXIST):
             tree.get_children("nonexistent")
     
     def test_get_parent(self):
@@ -128,6 +143,18 @@ class TestWritingTreeEdges:
         parent = tree.get_parent("ch1")
         assert parent == "root"
     
+    def test_get_parent_nested(self):
+        """Test getting parent of a nested node."""
+        tree = WritingTree()
+        tree.add_root_node(content="Story", word_count=5000)
+        tree.add_node(node_name="ch1", content="Chapter 1", word_count=2000)
+        tree.add_node(node_name="sec1", content="Section 1", word_count=1000)
+        tree.add_edge("root", "ch1")
+        tree.add_edge("ch1", "sec1")
+        
+        assert tree.get_parent("sec1") == "ch1"
+        assert tree.get_parent("ch1") == "root"
+    
     def test_get_parent_of_root(self):
         """Test getting parent of root returns None."""
         tree = WritingTree()
@@ -160,27 +187,64 @@ class TestWritingTreeTraversal:
         nodes = list(tree.traverse_dfs())
         assert nodes == ["root", "ch1", "sec1"]
     
-    def test_traverse_dfs_branching_tree(self):
+    def test_traverse_dfs_branching_tree(self, branching_tree):
         """Test DFS traversal with branching tree."""
+        nodes = list(branching_tree.traverse_dfs())
+        # Should visit root, then ch1, then ch2 (or ch2 then ch1)
+        assert nodes[0] == "root"
+        assert set(nodes[1:]) == {"ch1", "ch2"}
+    
+    def test_traverse_dfs_after_adding_edge(self):
+        """Test DFS traversal reflects edges added after a previous traversal."""
         tree = WritingTree()
         tree.add_root_node(content="Story", word_count=5000)
         tree.add_node(node_name="ch1", content="Chapter 1", word_count=2000)
-        tree.add_node(node_name="ch2", content="Chapter 2", word_count=3000)
         tree.add_edge("root", "ch1")
-        tree.add_edge("root", "ch2")
+        assert list(tree.traverse_dfs()) == ["root", "ch1"]
         
-        nodes = list(tree.traverse_dfs())
-        # Should visit root, then ch1, then ch2 (or ch2 then ch1)
-        assert nodes[0] == "root"
-        assert set(nodes[1:]) == {"ch1", "ch2"}
+        tree.add_node(node_name="sec1", content="Section 1", word_count=1000)
+        tree.add_edge("ch1", "sec1")
+        assert list(tree.traverse_dfs()) == ["root", "ch1", "sec1"]
     
     def test_traverse_dfs_nonexistent_start(self):
         """Test DFS traversal from nonexistent node raises error."""
         tree = WritingTree()
         tree.add_root_node(content="Story", word_count=1000)
         
-        with pytest.raises(TreeStructureError, match="does not exist"):
+        with pytest.raises(TreeStructureError, match=DOES_NOT_EXIST):
             list(tree.traverse_dfs("nonexistent"))
+    
+    def test_traverse_bfs_level_order(self, branching_tree):
+        """Test BFS traversal visits nodes level by level."""
+        tree = copy.deepcopy(branching_tree)
+        tree.add_node(node_name="sec1", content="Section 1", word_count=1000)
+        tree.add_edge("ch1", "sec1")
+        
+        assert list(tree.traverse_bfs()) == ["root", "ch1", "ch2", "sec1"]
+        assert list(tree.traverse_dfs()) == ["root", "ch1", "sec1", "ch2"]
+    
+    def test_traverse_bfs_nonexistent_start(self):
+        """Test BFS traversal from nonexistent node raises error."""
+        tree = WritingTree()
+        
+        with pytest.raises(TreeStructureError, match=DOES_NOT_EXIST):
+            list(tree.traverse_bfs("nonexistent"))
+    
+    def test_traverse_dfs_leaves_only(self):
+        """Test leaf traversal yields only leaves, in depth-first order."""
+        tree = WritingTree()
+        tree.add_root_node(content="Story", word_count=5000)
+        tree.add_node(node_name="ch1", content="Chapter 1", word_count=3000)
+        tree.add_node(node_name="ch2", content="Chapter 2", word_count=2000)
+        tree.add_node(node_name="ch1_1", content="Scene 1", word_count=1500)
+        tree.add_node(node_name="ch1_2", content="Scene 2", word_count=1500)
+        tree.add_edge("root", "ch1")
+        tree.add_edge("root", "ch2")
+        tree.add_edge("ch1", "ch1_2")
+        tree.add_edge("ch1", "ch1_1")
+        
+        assert list(tree.traverse_dfs_leaves_only()) == ["ch1_2", "ch1_1", "ch2"]
+        assert sorted(tree.traverse_dfs_leaves_only()) == sorted(tree.get_leaf_nodes())
 
 
 class TestWritingTreeLeafNodes:
@@ -200,18 +264,23 @@ class TestWritingTreeLeafNodes:
         leaves = tree.get_leaf_nodes()
         assert leaves == ["root"]
     
-    def test_get_leaf_nodes_with_children(self):
+    def test_get_leaf_nodes_with_children(self, branching_tree):
         """Test getting leaf nodes in tree with children."""
+        leaves = branching_tree.get_leaf_nodes()
+        assert set(leaves) == {"ch1", "ch2"}
+        assert "root" not in leaves
+    
+    def test_iter_ready_leaves(self):
+        """Test ready leaves have an outline and no generated text."""
         tree = WritingTree()
         tree.add_root_node(content="Story", word_count=5000)
-        tree.add_node(node_name="ch1", content="Chapter 1", word_count=2000)
-        tree.add_node(node_name="ch2", content="Chapter 2", word_count=3000)
-        tree.add_edge("root", "ch1")
-        tree.add_edge("root", "ch2")
+        for name in ("ch1", "ch2", "ch3"):
+            tree.add_node(node_name=name, content=name, word_count=1000)
+            tree.add_edge("root", name)
+        tree.update_node_metadata("ch1", outline="Outline 1")
+        tree.update_node_metadata("ch2", outline="Outline 2", generated_text="Done")
         
-        leaves = tree.get_leaf_nodes()
-        assert set(leaves) == {"ch1", "ch2"}
-        assert "root" not in leaves
+        assert list(tree.iter_ready_leaves()) == ["ch1"]
     
     def test_mark_as_leaf(self):
         """Test marking a node as leaf."""
@@ -224,6 +293,29 @@ class TestWritingTreeLeafNodes:
         assert node["node_type"] == "leaf"
 
 
+class TestWritingTreePlan:
+    """Tests for serializing the tree shape."""
+    
+    def test_to_plan(self, branching_tree):
+        """Test to_plan keeps content, word count and children only."""
+        tree = copy.deepcopy(branching_tree)
+        tree.update_node_metadata("ch1", outline="Outline", generated_text="Text")
+        
+        assert tree.to_plan() == {
+            "content": "Story",
+            "word_count": 5000,
+            "children": [
+                {"content": "Chapter 1", "word_count": 2000, "children": []},
+                {"content": "Chapter 2", "word_count": 3000, "children": []},
+            ],
+        }
+    
+    def test_to_plan_nonexistent_node(self, branching_tree):
+        """Test serializing a nonexistent subtree raises error."""
+        with pytest.raises(TreeStructureError, match=DOES_NOT_EXIST):
+            branching_tree.to_plan("nonexistent")
+
+
 class TestWritingTreeMetadataUpdate:
     """Tests for updating node metadata."""
     
@@ -237,11 +329,28 @@ class TestWritingTreeMetadataUpdate:
         assert node["theme"] == "Adventure"
         assert node["writing_tone"] == "Epic"
     
+    def test_get_node_returns_copy(self):
+        """Test modifying a returned node does not change the tree."""
+        tree = WritingTree()
+        tree.add_root_node(content="Story", word_count=1000)
+        
+        node = tree.get_node("root")
+        node["content"] = "Changed"
+        assert tree.get_node("root")["content"] == "Story"
+    
+    def test_update_unknown_field_ignored(self):
+        """Test updating a field that is not node metadata is ignored."""
+        tree = WritingTree()
+        tree.add_root_node(content="Story", word_count=1000)
+        
+        tree.update_node_metadata("root", not_a_field="value")
+        assert "not_a_field" not in tree.get_node("root")
+    
     def test_update_nonexistent_node(self):
         """Test updating nonexistent node raises error."""
         tree = WritingTree()
         
-        with pytest.raises(TreeStructureError, match="does not exist"):
+        with pytest.raises(TreeStructureError, match=DOES_NOT_EXIST):
             tree.update_node_metadata("nonexistent", theme="Adventure")
     
     def test_update_generated_text(self):
@@ -0,0 +1,66 @@
+"""Tests for utility functions."""
+
+import pytest
+from treewriter.utils import allocate_word_counts, count_words, extract_json
+
+
+class TestCountWords:
+    """Tests for word counting."""
+    
+    def test_count_english_words(self):
+        """Test counting whitespace-separated words."""
+        assert count_words("Once upon a  time\nthere was") == 6
+    
+    def test_count_chinese_characters(self):
+        """Test each Chinese character counts as one word."""
+        assert count_words("勇敢的小女孩") == 6
+    
+    def test_count_mixed_text(self):
+        """Test counting text mixing Chinese and English."""
+        assert count_words("人工智能 AI 与人性") == 8
+    
+    def test_count_empty_text(self):
+        """Test counting empty or whitespace-only text."""
+        assert count_words("") == 0
+        assert count_words("  \n ") == 0
+
+
+class TestAllocateWordCounts:
+    """Tests for largest-remainder word count allocation."""
+    
+    @pytest.mark.parametrize("weights, total, expected", [
+        ([1, 1, 1], 1000, [334, 333, 333]),
+        ([1000, 2000], 4500, [1500, 3000]),
+        ([300, 500, 700], 1000, [200, 333, 467]),
+        ([5, 0, 5], 7, [4, 0, 3]),
+    ])
+    def test_allocation_sums_to_total(self, weights, total, expected):
+        """Test counts stay proportional and add up exactly to the total."""
+        counts = allocate_word_counts(weights, total)
+        assert counts == expected
+        assert sum(counts) == total
+    
+    def test_float_weights_are_rounded(self):
+        """Test float word counts from JSON responses are allocated as whole words."""
+        counts = allocate_word_counts([1000.4, 1999.6], 6000.0)
+        assert counts == [2000, 4000]
+        assert all(isinstance(count, int) for count in counts)
+
+
+class TestExtractJson:
+    """Tests for extracting JSON objects from model output."""
+    
+    def test_prefers_fenced_object(self):
+        """Test the object after a ```json fence is returned."""
+        text = 'Plan {draft}\n```json\n{"a": {"b": 1}}\n```'
+        assert extract_json(text) == '{"a": {"b": 1}}'
+    
+    def test_ignores_braces_in_strings_and_after_object(self):
+        """Test braces inside strings and trailing text do not end the object."""
+        text = '{"text": "a } and \\" {"} trailing {note}'
+        assert extract_json(text) == '{"text": "a } and \\" {"}'
+    
+    def test_incomplete_object(self):
+        """Test None is returned when no object is closed."""
+        assert extract_json("no JSON here") is None
+        assert extract_json('{"a": 1') is None
@@ -0,0 +1,70 @@
+"""Tests for the writing model (without actual API calls)."""
+
+import pytest
+from treewriter.writing import WritingModel
+from treewriter.tree import WritingTree
+
+
+def build_leaf_tree():
+    """Build a root with a single leaf chapter."""
+    tree = WritingTree()
+    tree.add_root_node(content="Story", word_count=1000, writing_tone="Warm")
+    tree.add_node(node_name="ch1", content="Chapter 1", word_count=1000, writing_tone="Warm")
+    tree.add_edge("root", "ch1")
+    tree.mark_as_leaf("ch1")
+    return tree
+
+
+class TestBuildRequest:
+    """Tests for building text requests."""
+    
+    def test_outline_goes_in_user_message(self, sample_model_config):
+        """Test the system message holds the story context and the user message the leaf."""
+        model = WritingModel(sample_model_config, language="en")
+        tree = build_leaf_tree()
+        
+        system, user = model.build_request(tree.get_node("ch1"), "Meet the dragon", tree)["messages"]
+        
+        assert system["role"] == "system"
+        assert "Story" in system["content"] and "Warm" in system["content"]
+        assert "Meet the dragon" not in system["content"]
+        assert user["role"] == "user"
+        assert "Chapter 1" in user["content"] and "Meet the dragon" in user["content"]
+    
+    def test_fused_request_shares_system_message(self, sample_model_config):
+        """Test fused requests start with the same system message as text requests."""
+        model = WritingModel(sample_model_config, language="en")
+        tree = build_leaf_tree()
+        node = tree.get_node("ch1")
+        
+        system, user = model.build_fused_request(node, tree)["messages"]
+        
+        assert system == model.build_request(node, "Meet the dragon", tree)["messages"][0]
+        assert "Chapter 1" in user["content"] and '"outline"' in user["content"]
+    
+    def test_custom_template_disables_fusion(self, sample_model_config):
+        """Test a custom template leaves no fused prompt to bypass it."""
+        model = WritingModel(sample_model_config, prompt_template="Write {content}")
+        tree = build_leaf_tree()
+        
+        assert model.fused_template is None
+        with pytest.raises(ValueError):
+            model.build_fused_request(tree.get_node("ch1"), tree)
+
+
+class TestParseFusedResponse:
+    """Tests for parsing fused outline and text responses."""
+    
+    def test_ignores_braces_after_the_object(self, sample_model_config):
+        """Test text after the JSON object does not break parsing."""
+        model = WritingModel(sample_model_config)
+        response = '```json\n{"outline": "Plan", "text": "Once {upon} a time"}\n```\nNote: {done}'
+        
+        assert model._parse_fused_response(response) == ("Plan", "Once {upon} a time")
+    
+    def test_rejects_response_without_json(self, sample_model_config):
+        """Test a prose response is reported as unparseable."""
+        model = WritingModel(sample_model_config)
+        
+        with pytest.raises(ValueError):
+            model._parse_fused_response("Just some prose")
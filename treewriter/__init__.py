@@ -7,13 +7,20 @@ and writing.
 
 __version__ = "0.1.0"
 
+import importlib
+
 from .tree import WritingTree
-from .planning import PlanningAgent
-from .thinking import ThinkingModel
-from .writing import WritingModel
-from .orchestrator import TreeWriter
 from .config import ModelConfig, ThresholdConfig, NodeMetadata
 
+# Model-backed classes pull in the OpenAI client, so they are imported on
+# first attribute access (PEP 562) instead of at package import time
+_LAZY_IMPORTS = {
+    "PlanningAgent": ".planning",
+    "ThinkingModel": ".thinking",
+    "WritingModel": ".writing",
+    "TreeWriter": ".orchestrator",
+}
+
 __all__ = [
     "WritingTree",
     "PlanningAgent",
@@ -24,3 +31,33 @@ __all__ = [
     "ThresholdConfig",
     "NodeMetadata",
 ]
+
+
+def __getattr__(name):
+    """Import model-backed classes lazily on first access.
+    
+    Args:
+        name: Attribute name requested from the package
+        
+    Returns:
+        The requested class, cached in the package namespace
+        
+    Raises:
+        AttributeError: If name is not a lazily imported attribute
+    """
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List package attributes, including lazily imported ones.
+    
+    Returns:
+        Sorted list of attribute names
+    """
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,186 @@
+"""On-disk caches for planning: plans by goal embedding, decisions by prompt."""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from array import array
+from contextlib import closing
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+PLAN_EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Compute the cosine similarity of two vectors.
+    
+    Args:
+        a: First vector
+        b: Second vector
+        
+    Returns:
+        Cosine similarity, or 0.0 if either vector is all zeros
+    """
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    if not norm:
+        return 0.0
+    return sum(x * y for x, y in zip(a, b)) / norm
+
+
+class PlanCache:
+    """SQLite-backed store of planning trees from earlier tasks.
+    
+    Each entry keeps the goal text, its embedding and the plan as nested
+    JSON (see WritingTree.to_plan). Lookups compare a new goal embedding
+    against every stored one, which is fine for the few hundred plans a
+    single user accumulates.
+    
+    Attributes:
+        path: Path of the SQLite database file
+    """
+    
+    def __init__(self, path: str):
+        """Open the cache, creating the database file if needed.
+        
+        Args:
+            path: Path of the SQLite database file; "~" is expanded
+        """
+        self.path = os.path.expanduser(path)
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS plan_cache ("
+                "goal_text TEXT NOT NULL, "
+                "embedding BLOB NOT NULL, "
+                "plan_json TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+    
+    def lookup(
+        self,
+        embedding: Sequence[float],
+        min_similarity: float
+    ) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Find the stored plan whose goal is most similar to a new one.
+        
+        Args:
+            embedding: Embedding of the new goal
+            min_similarity: Minimum cosine similarity for a match
+            
+        Returns:
+            Tuple of (similarity, plan) for the best match, or None if no
+            stored plan is similar enough
+        """
+        with closing(sqlite3.connect(self.path)) as conn:
+            rows = conn.execute("SELECT embedding, plan_json FROM plan_cache").fetchall()
+        
+        best_similarity = min_similarity
+        best_plan_json = None
+        for blob, plan_json in rows:
+            stored = array("d")
+            stored.frombytes(blob)
+            similarity = cosine_similarity(embedding, stored)
+            if similarity >= best_similarity:
+                best_similarity = similarity
+                best_plan_json = plan_json
+        
+        if best_plan_json is None:
+            return None
+        return best_similarity, json.loads(best_plan_json)
+    
+    def store(
+        self,
+        goal_text: str,
+        embedding: Sequence[float],
+        plan: Dict[str, Any]
+    ) -> None:
+        """Add a plan to the cache.
+        
+        Args:
+            goal_text: Text the embedding was computed from
+            embedding: Embedding of the goal text
+            plan: Nested plan from WritingTree.to_plan
+        """
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "INSERT INTO plan_cache (goal_text, embedding, plan_json, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    goal_text,
+                    array("d", embedding).tobytes(),
+                    json.dumps(plan, ensure_ascii=False),
+                    time.time(),
+                )
+            )
+    
+    def __len__(self) -> int:
+        """Get number of cached plans.
+        
+        Returns:
+            Number of stored plans
+        """
+        with closing(sqlite3.connect(self.path)) as conn:
+            return conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0]
+
+
+class DecisionCache:
+    """SQLite-backed exact-match store of parsed planning agent decisions.
+    
+    Attributes:
+        path: Path of the SQLite database file
+    """
+    
+    def __init__(self, path: str):
+        """Open the cache, creating the database file if needed.
+        
+        Args:
+            path: Path of the SQLite database file; "~" is expanded
+        """
+        self.path = os.path.expanduser(path)
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS decision_cache ("
+                "key TEXT PRIMARY KEY, "
+                "decision_json TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a decision by prompt hash.
+        
+        Args:
+            key: Prompt hash
+            
+        Returns:
+            Stored decision, or None if there is none
+        """
+        with closing(sqlite3.connect(self.path)) as conn:
+            row = conn.execute(
+                "SELECT decision_json FROM decision_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def put(self, key: str, decision: Dict[str, Any]) -> None:
+        """Store a decision, replacing any earlier one for the same key.
+        
+        Args:
+            key: Prompt hash
+            decision: Parsed decision
+        """
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO decision_cache (key, decision_json, created_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(decision, ensure_ascii=False), time.time())
+            )
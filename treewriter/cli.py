@@ -1,23 +1,36 @@
 """Command-line interface for TreeWriter."""
 
 import argparse
+import contextlib
+import functools
+import logging
 import os
+import stat
 import sys
-from typing import Optional
+import tempfile
+from typing import Iterable, List, Optional
 
 from .config import ModelConfig, ThresholdConfig
-from .orchestrator import TreeWriter
-from .utils import setup_logger
+from .utils import setup_logger, count_words
 
 
-logger = setup_logger(__name__)
+# Handlers are only installed by main() when --verbose is given
+logger = logging.getLogger(__name__)
 
 
-def parse_args():
-    """Parse command-line arguments.
+# Write buffer for --output, large enough that chunks are not flushed one by one
+_OUTPUT_BUFFER_SIZE = 1 << 16
+
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser.
+    
+    The parser is built once and cached, so repeated calls to parse_args
+    reuse it.
     
     Returns:
-        Parsed arguments
+        Configured argument parser
     """
     parser = argparse.ArgumentParser(
         description="TreeWriter - Hierarchical long-text generation system",
@@ -67,7 +80,7 @@ Examples:
     model_group.add_argument(
         "--api-key",
         type=str,
-        default=os.environ.get("OPENAI_API_KEY"),
+        default=None,
         help="OpenAI API key (default: from OPENAI_API_KEY env var)"
     )
     
@@ -223,23 +236,91 @@ Examples:
         help="Enable verbose logging"
     )
     
-    return parser.parse_args()
+    return parser
+
+
+def _write_output(path: str, chunks: Iterable[str]) -> int:
+    """Write generated chunks to a file, replacing it only on success.
+    
+    Chunks go to a temporary file in the same directory, which is moved
+    onto path once all of them are written. A failed or interrupted run
+    leaves an existing file untouched.
+    
+    Args:
+        path: Output file path
+        chunks: Text chunks to write
+        
+    Returns:
+        Word count of the written text
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=f".{os.path.basename(path)}.",
+        suffix=".tmp"
+    )
+    try:
+        word_count = 0
+        with open(fd, "w", encoding="utf-8", buffering=_OUTPUT_BUFFER_SIZE) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                word_count += count_words(chunk)
+        # mkstemp creates the file private; give it the permissions the
+        # output would have had if written directly
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    
+    return word_count
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    """Parse command-line arguments.
+    
+    Args:
+        argv: Arguments to parse (default: sys.argv[1:])
+        
+    Returns:
+        Parsed arguments
+    """
+    args = _build_parser().parse_args(argv)
+    
+    # Read the environment at parse time, not when the cached parser was built
+    if args.api_key is None:
+        args.api_key = os.environ.get("OPENAI_API_KEY")
+    
+    return args
 
 
-def main():
-    """Main CLI entry point."""
-    args = parse_args()
+def main(argv: Optional[List[str]] = None):
+    """Main CLI entry point.
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+    """
+    args = parse_args(argv)
+    
+    # Deferred so that --help and argument errors don't import the OpenAI client
+    from .orchestrator import TreeWriter
     
     # Set up logging
     if args.verbose:
-        import logging
-        logger.setLevel(logging.DEBUG)
+        setup_logger(__name__, level=logging.DEBUG)
     
     # Validate API key
     if not args.api_key:
         print("Error: API key is required. Set OPENAI_API_KEY environment variable or use --api-key", file=sys.stderr)
         sys.exit(1)
     
+    writer = None
     try:
         # Create model configuration
         model_config = ModelConfig(
@@ -273,14 +354,14 @@ def main():
         # Parse character list
         character_list = None
         if args.characters:
-            character_list = [c.strip() for c in args.characters.split(",")]
+            character_list = list(map(str.strip, args.characters.split(",")))
         
         # Generate text
         print(f"\nGenerating text for task: {args.task}")
         print(f"Target word count: {args.word_count}")
         print(f"This may take several minutes...\n")
         
-        text = writer.generate(
+        generate_kwargs = dict(
             task=args.task,
             word_count=args.word_count,
             story_setting=args.setting,
@@ -297,18 +378,19 @@ def main():
         
         # Output text
         if args.output:
-            with open(args.output, "w", encoding="utf-8") as f:
-                f.write(text)
+            word_count = _write_output(args.output, writer.generate_stream(**generate_kwargs))
             print(f"\n✓ Text generated successfully!")
             print(f"✓ Saved to: {args.output}")
-            print(f"✓ Word count: {len(text.split())} words")
+            print(f"✓ Word count: {word_count} words")
         else:
+            text = writer.generate(**generate_kwargs)
+            word_count = count_words(text)
             print("\n" + "="*80)
             print("GENERATED TEXT")
             print("="*80 + "\n")
             print(text)
             print("\n" + "="*80)
-            print(f"Word count: {len(text.split())} words")
+            print(f"Word count: {word_count} words")
             print("="*80)
         
     except KeyboardInterrupt:
@@ -320,6 +402,9 @@ def main():
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        if writer is not None:
+            writer.close()
 
 
 if __name__ == "__main__":
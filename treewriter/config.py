@@ -1,13 +1,22 @@
 """Configuration dataclasses for TreeWriter."""
 
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
 from typing import Optional, List, Dict, Any
 
 
-@dataclass
+# Slotted dataclasses drop the per-instance __dict__; slots=True needs Python 3.10+
+_DATACLASS_OPTIONS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_OPTIONS)
 class ModelConfig:
     """Configuration for a model (planning/thinking/writing).
     
+    ModelConfig is frozen, so instances are hashable and equal configurations
+    can share one API client (see treewriter.llm.get_client).
+    
     Attributes:
         model_type: Type of model - "api" or "local"
         api_key: API key for API-based models
@@ -36,12 +45,20 @@ class ModelConfig:
     top_p: float = 0.95
     max_tokens: int = 4096
     
+    # Set after a successful validate(); fields can't change afterwards
+    _validated: bool = field(default=False, init=False, repr=False, compare=False)
+    
     def validate(self) -> None:
         """Validate configuration parameters.
         
+        Returns immediately if the configuration has already been validated.
+        
         Raises:
             ValueError: If configuration is invalid
         """
+        if self._validated:
+            return
+        
         if self.model_type not in ["api", "local"]:
             raise ValueError(f"model_type must be 'api' or 'local', got '{self.model_type}'")
         
@@ -65,9 +82,11 @@ class ModelConfig:
         
         if self.max_tokens <= 0:
             raise ValueError(f"max_tokens must be positive, got {self.max_tokens}")
+        
+        object.__setattr__(self, "_validated", True)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ThresholdConfig:
     """Configuration for threshold-based decomposition check.
     
@@ -76,6 +95,12 @@ class ThresholdConfig:
         max_word_count: Must decompose nodes above this word count
         min_children: Minimum number of children when decomposing
         max_children: Maximum number of children when decomposing
+        plan_cache_enabled: Reuse cached plans of similar earlier tasks
+        plan_cache_path: SQLite file holding the plan cache
+        plan_cache_similarity: Minimum cosine similarity for a cached plan
+            to be reused
+        decision_cache_path: SQLite file persisting planning agent decisions
+            across runs (None keeps them in memory only)
     """
     
     min_word_count: int = 1000
@@ -83,12 +108,35 @@ class ThresholdConfig:
     min_children: int = 2
     max_children: int = 5
     
+    # Plan cache
+    plan_cache_enabled: bool = False
+    plan_cache_path: str = "~/.cache/treewriter/plans.sqlite3"
+    plan_cache_similarity: float = 0.90
+    
+    # Persistent exact-match cache of planning decisions
+    decision_cache_path: Optional[str] = None
+    
+    # Set after a successful validate(); cleared whenever a field changes
+    _validated: bool = field(default=False, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute and invalidate any earlier validation."""
+        object.__setattr__(self, name, value)
+        if name != "_validated":
+            object.__setattr__(self, "_validated", False)
+    
     def validate(self) -> None:
         """Validate threshold configuration.
         
+        Returns immediately if the configuration has already been validated
+        and not modified since.
+        
         Raises:
             ValueError: If configuration is invalid
         """
+        if self._validated:
+            return
+        
         if self.min_word_count <= 0:
             raise ValueError(f"min_word_count must be positive, got {self.min_word_count}")
         
@@ -106,9 +154,16 @@ class ThresholdConfig:
                 f"max_children ({self.max_children}) must be >= "
                 f"min_children ({self.min_children})"
             )
+        
+        if self.plan_cache_similarity <= 0 or self.plan_cache_similarity > 1:
+            raise ValueError(
+                f"plan_cache_similarity must be in (0, 1], got {self.plan_cache_similarity}"
+            )
+        
+        self._validated = True
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class NodeMetadata:
     """Metadata for a tree node.
     
@@ -128,6 +183,8 @@ class NodeMetadata:
         outline: Writing outline (from thinking model)
         generated_text: Generated text content (from writing model)
         decompose_threshold_passed: Whether threshold check passed
+        decompose_threshold_decision: Threshold check result - "force",
+            "skip", or "ask" (agent decides)
         decompose_agent_decision: Agent's decomposition decision
         decompose_agent_reasoning: Agent's reasoning for decision
     """
@@ -154,6 +211,7 @@ class NodeMetadata:
     
     # Decomposition metadata
     decompose_threshold_passed: Optional[bool] = None
+    decompose_threshold_decision: Optional[str] = None  # "force", "skip", or "ask"
     decompose_agent_decision: Optional[bool] = None
     decompose_agent_reasoning: Optional[str] = None
     
@@ -163,25 +221,7 @@ class NodeMetadata:
         Returns:
             Dictionary representation of metadata
         """
-        return {
-            "content": self.content,
-            "word_count": self.word_count,
-            "node_type": self.node_type,
-            "story_setting": self.story_setting,
-            "character_list": self.character_list,
-            "writing_tone": self.writing_tone,
-            "language_style": self.language_style,
-            "theme": self.theme,
-            "story_structure": self.story_structure,
-            "plot_development": self.plot_development,
-            "worldbuilding": self.worldbuilding,
-            "writing_goals": self.writing_goals,
-            "outline": self.outline,
-            "generated_text": self.generated_text,
-            "decompose_threshold_passed": self.decompose_threshold_passed,
-            "decompose_agent_decision": self.decompose_agent_decision,
-            "decompose_agent_reasoning": self.decompose_agent_reasoning,
-        }
+        return dict(zip(_NODE_METADATA_FIELDS, _get_node_metadata_values(self)))
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "NodeMetadata":
@@ -194,3 +234,8 @@ class NodeMetadata:
             NodeMetadata instance
         """
         return cls(**data)
+
+
+# Field names in declaration order, computed once for NodeMetadata.to_dict
+_NODE_METADATA_FIELDS = tuple(f.name for f in fields(NodeMetadata))
+_get_node_metadata_values = attrgetter(*_NODE_METADATA_FIELDS)
@@ -0,0 +1,290 @@
+"""Shared LLM client helpers for TreeWriter."""
+
+import asyncio
+import importlib.util
+import json
+import random
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from openai import (
+    DEFAULT_MAX_RETRIES,
+    APIConnectionError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
+
+from .config import ModelConfig
+from .utils import setup_logger, BatchError
+
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Transient API errors worth retrying (APITimeoutError is an APIConnectionError)
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+RETRY_ATTEMPTS = 5
+RETRY_MIN_WAIT = 1.0
+RETRY_MAX_WAIT = 30.0
+# Longest server-requested Retry-After that is honoured, as in the SDK
+RETRY_AFTER_MAX = 60.0
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def create_http_client() -> DefaultHttpxClient:
+    """Create an HTTP client for several OpenAI clients to share.
+    
+    The client keeps the OpenAI SDK defaults for timeouts and pool
+    limits, and multiplexes requests over HTTP/2 when h2 is installed.
+    The caller owns the client and must close it.
+    
+    Returns:
+        HTTP client to pass as http_client to get_client
+    """
+    return DefaultHttpxClient(http2=HTTP2_AVAILABLE)
+
+
+def get_client(
+    model_config: ModelConfig,
+    http_client: Optional[DefaultHttpxClient] = None
+) -> OpenAI:
+    """Get an OpenAI client for a model configuration.
+    
+    Without an HTTP client, clients are cached per configuration, so
+    agents that share a ModelConfig (or an equal one) also share the
+    client and its connection pool. With one, a new client is created
+    on top of it; the pool is already shared, and caching would keep
+    the HTTP client alive after its owner closed it.
+    
+    Args:
+        model_config: API model configuration
+        http_client: Shared HTTP client (optional, the OpenAI client
+            creates its own if omitted)
+        
+    Returns:
+        OpenAI client for the configured endpoint
+    """
+    if http_client is None:
+        return _get_default_client(model_config)
+    return _create_client(model_config, http_client)
+
+
+@lru_cache(maxsize=8)
+def _get_default_client(model_config: ModelConfig) -> OpenAI:
+    """Get the cached OpenAI client that owns its HTTP client."""
+    return _create_client(model_config, None)
+
+
+def _create_client(
+    model_config: ModelConfig,
+    http_client: Optional[DefaultHttpxClient]
+) -> OpenAI:
+    """Create an OpenAI client; retries are handled by call_with_retry."""
+    return OpenAI(
+        api_key=model_config.api_key,
+        base_url=model_config.api_endpoint,
+        http_client=http_client,
+        max_retries=0
+    )
+
+
+def create_async_http_client() -> DefaultAsyncHttpxClient:
+    """Create an async HTTP client for several AsyncOpenAI clients to share.
+    
+    Returns:
+        Async HTTP client to pass as http_client to get_async_client
+    """
+    return DefaultAsyncHttpxClient(http2=HTTP2_AVAILABLE)
+
+
+def get_async_client(
+    model_config: ModelConfig,
+    http_client: Optional[DefaultAsyncHttpxClient] = None
+) -> AsyncOpenAI:
+    """Create an AsyncOpenAI client for a model configuration.
+    
+    Unlike get_client, clients are not cached: async connections belong
+    to the event loop that opened them, so each run creates its own.
+    
+    Args:
+        model_config: API model configuration
+        http_client: Shared async HTTP client (optional)
+        
+    Returns:
+        AsyncOpenAI client for the configured endpoint
+    """
+    return AsyncOpenAI(
+        api_key=model_config.api_key,
+        base_url=model_config.api_endpoint,
+        http_client=http_client,
+        max_retries=0
+    )
+
+
+def _retry_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """Pick the delay before retrying a failed call.
+    
+    A Retry-After header on the error's response is honoured when it
+    gives a number of seconds up to RETRY_AFTER_MAX; otherwise the delay
+    is an exponential backoff with full jitter.
+    
+    Args:
+        attempt: Number of attempts made so far (1-based)
+        error: Error raised by the failed attempt
+        
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+        if retry_after is not None and 0 <= retry_after <= RETRY_AFTER_MAX:
+            return retry_after
+    return random.uniform(RETRY_MIN_WAIT, min(RETRY_MAX_WAIT, RETRY_MIN_WAIT * 2 ** attempt))
+
+
+def call_with_retry(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call an API method, retrying transient errors with backoff.
+    
+    Rate limits, server errors, timeouts and connection errors are
+    retried up to RETRY_ATTEMPTS attempts in total; any other error is
+    raised immediately.
+    
+    Args:
+        func: API method to call, e.g. client.chat.completions.create
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+        
+    Returns:
+        Return value of func
+        
+    Raises:
+        The last retryable error once all attempts have failed
+    """
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return func(*args, **kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == RETRY_ATTEMPTS:
+                raise
+            delay = _retry_delay(attempt, e)
+            logger.warning(f"API call failed ({e}), retry {attempt}/{RETRY_ATTEMPTS - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def acall_with_retry(func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+    """Await an async API method, retrying transient errors with backoff.
+    
+    Async counterpart of call_with_retry; waits without blocking the
+    event loop.
+    
+    Args:
+        func: Async API method to call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+        
+    Returns:
+        Result of awaiting func
+        
+    Raises:
+        The last retryable error once all attempts have failed
+    """
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return await func(*args, **kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == RETRY_ATTEMPTS:
+                raise
+            delay = _retry_delay(attempt, e)
+            logger.warning(f"API call failed ({e}), retry {attempt}/{RETRY_ATTEMPTS - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def run_batch(
+    client: OpenAI,
+    requests: Dict[str, Dict[str, Any]],
+    poll_interval: float = 10.0,
+    timeout: Optional[float] = None
+) -> Dict[str, str]:
+    """Run chat completion requests as one OpenAI Batch job.
+    
+    Args:
+        client: OpenAI client to submit the batch with
+        requests: Mapping of custom_id to chat completion request body
+        poll_interval: Seconds to wait between batch status checks
+        timeout: Seconds to wait for the batch to finish before it is
+            cancelled (None waits for the batch's completion window)
+        
+    Returns:
+        Mapping of custom_id to response message content, for every
+        request that succeeded
+        
+    Raises:
+        BatchError: If the batch ends in any status other than completed,
+            or does not finish within timeout
+    """
+    lines = [
+        json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_URL,
+            "body": body,
+        }, ensure_ascii=False)
+        for custom_id, body in requests.items()
+    ]
+    batch_input = "\n".join(lines).encode("utf-8")
+    
+    # Creating the file and the batch is not idempotent, so these are left
+    # to the SDK's retries, which resend the same idempotency key
+    creating_client = client.with_options(max_retries=DEFAULT_MAX_RETRIES)
+    input_file = creating_client.files.create(
+        file=("batch_input.jsonl", batch_input),
+        purpose="batch"
+    )
+    batch = creating_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=CHAT_COMPLETIONS_URL,
+        completion_window="24h"
+    )
+    
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        if deadline is not None and time.monotonic() >= deadline:
+            try:
+                client.batches.cancel(batch.id)
+            except Exception as e:
+                logger.warning(f"Failed to cancel batch {batch.id}: {e}")
+            raise BatchError(f"Batch {batch.id} did not finish within {timeout:.0f}s")
+        time.sleep(poll_interval)
+        batch = call_with_retry(client.batches.retrieve, batch.id)
+    
+    if batch.status != "completed" or not batch.output_file_id:
+        raise BatchError(f"Batch {batch.id} ended with status '{batch.status}'")
+    
+    output = call_with_retry(client.files.content, batch.output_file_id).text
+    
+    results = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    
+    return results
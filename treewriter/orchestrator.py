@@ -1,17 +1,93 @@
 """TreeWriter orchestrator - main coordinator for text generation."""
 
-from typing import Optional, List
+import asyncio
+import functools
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, List, Tuple
+from openai import AsyncOpenAI, OpenAI
 from .config import ModelConfig, ThresholdConfig
 from .tree import WritingTree
 from .planning import PlanningAgent
 from .thinking import ThinkingModel
 from .writing import WritingModel
+from .llm import create_async_http_client, create_http_client, get_async_client, run_batch
 from .utils import setup_logger, count_words
 
 
 logger = setup_logger(__name__)
 
 
+@dataclass(frozen=True)
+class _LeafStep:
+    """A per-leaf generation step of Phases 2 and 3.
+    
+    The sync and async pipelines both run the steps in _LEAF_STEPS order;
+    they differ only in how the model call is made.
+    
+    Attributes:
+        label: What the step generates, for progress logging
+        model: TreeWriter attribute holding the model to call
+        method: Name of the model's generation method; its async variant
+            has the same name prefixed with "a" and takes the client last
+        fields: Metadata fields the result is stored in, in result order
+        select: TreeWriter method listing the leaves the step processes
+        batch: TreeWriter method requesting those leaves as one batch job,
+            or None if the step is never batched
+        pass_outline: Whether the leaf's outline is passed to the model
+        failure: Log message for a failed leaf, formatted with node_name
+        failure_level: Logging level of the failure message
+        phase: Message logged when the step starts a new phase
+    """
+    label: str
+    model: str
+    method: str
+    fields: Tuple[str, ...]
+    select: str
+    batch: Optional[str] = None
+    pass_outline: bool = False
+    failure: str = "Failed to generate {label} for '{node_name}'"
+    failure_level: int = logging.ERROR
+    phase: Optional[str] = None
+
+
+# Phases 2 and 3: small leaves get outline and text from one fused call,
+# and leaves it failed for (or all leaves, without fusion) go through the
+# separate outline and text steps
+_LEAF_STEPS = (
+    _LeafStep(
+        label="outline and text",
+        model="writing_model",
+        method="generate_outline_and_text",
+        fields=("outline", "generated_text"),
+        select="_small_leaves",
+        failure="Fused generation failed for '{node_name}', using separate calls",
+        failure_level=logging.WARNING,
+        phase="Phase 2: Generating outlines...",
+    ),
+    _LeafStep(
+        label="outline",
+        model="thinking_model",
+        method="generate_outline",
+        fields=("outline",),
+        select="_outline_leaves",
+        batch="_batch_outlines",
+    ),
+    _LeafStep(
+        label="text",
+        model="writing_model",
+        method="generate_text",
+        fields=("generated_text",),
+        select="_ready_leaves",
+        batch="_batch_texts",
+        pass_outline=True,
+        phase="Phase 3: Generating text...",
+    ),
+)
+
+
 class TreeWriter:
     """Main orchestrator for hierarchical text generation.
     
@@ -24,6 +100,16 @@ class TreeWriter:
         planning_agent: Agent for tree generation
         thinking_model: Model for outline generation
         writing_model: Model for text generation
+        use_batch_api: Whether outlines and texts are submitted as OpenAI
+            Batch jobs instead of one request per leaf
+        batch_timeout: Seconds to wait for a batch job before falling back
+            to per-leaf requests
+        oneshot_planning: Whether the tree is planned with a single call
+        fuse_word_count: Leaves below this word count get their outline and
+            text from one fused call (0 disables fusion)
+        
+    The three agents share one HTTP connection pool; call close() to
+    release it.
     """
     
     def __init__(
@@ -32,7 +118,11 @@ class TreeWriter:
         thinking_config: ModelConfig,
         writing_config: ModelConfig,
         threshold_config: Optional[ThresholdConfig] = None,
-        language: str = "cn"
+        language: str = "cn",
+        use_batch_api: bool = False,
+        oneshot_planning: bool = False,
+        fuse_word_count: int = 0,
+        batch_timeout: float = 3600.0
     ):
         """Initialize TreeWriter with model configurations.
         
@@ -42,30 +132,58 @@ class TreeWriter:
             writing_config: Configuration for writing model
             threshold_config: Configuration for decomposition thresholds
             language: Language for prompts ("cn" or "en")
+            use_batch_api: Submit Phase 2 and Phase 3 requests as OpenAI
+                Batch jobs (cheaper, but may take up to 24 hours)
+            oneshot_planning: Plan the whole tree with one LLM call
+                (see PlanningAgent.build_tree_oneshot)
+            fuse_word_count: Generate outline and text of leaves below this
+                word count with a single call instead of two (0 disables)
+            batch_timeout: Seconds to wait for each batch job; a batch that
+                has not finished by then is cancelled and its leaves are
+                requested one by one
         """
         if threshold_config is None:
             threshold_config = ThresholdConfig()
         
-        self.planning_agent = PlanningAgent(
-            planning_config,
-            threshold_config,
-            language=language
-        )
-        
-        self.thinking_model = ThinkingModel(
-            thinking_config,
-            language=language
-        )
+        # One connection pool for all agents, so parallel leaves reuse
+        # connections instead of each client opening its own
+        self._http_client = create_http_client()
         
-        self.writing_model = WritingModel(
-            writing_config,
-            language=language
-        )
+        try:
+            self.planning_agent = PlanningAgent(
+                planning_config,
+                threshold_config,
+                language=language,
+                http_client=self._http_client
+            )
+            
+            self.thinking_model = ThinkingModel(
+                thinking_config,
+                language=language,
+                http_client=self._http_client
+            )
+            
+            self.writing_model = WritingModel(
+                writing_config,
+                language=language,
+                http_client=self._http_client
+            )
+        except Exception:
+            self._http_client.close()
+            raise
         
         self.language = language
+        self.use_batch_api = use_batch_api
+        self.oneshot_planning = oneshot_planning
+        self.fuse_word_count = fuse_word_count
+        self.batch_timeout = batch_timeout
         
         logger.info("TreeWriter initialized successfully")
     
+    def close(self) -> None:
+        """Close the HTTP connection pool shared by the agents."""
+        self._http_client.close()
+    
     def generate(
         self,
         task: str,
@@ -79,7 +197,8 @@ class TreeWriter:
         plot_development: Optional[str] = None,
         worldbuilding: Optional[str] = None,
         writing_goals: Optional[str] = None,
-        max_depth: int = 10
+        max_depth: int = 10,
+        max_concurrency: int = 8
     ) -> str:
         """Generate long text for the given task.
         
@@ -96,16 +215,137 @@ class TreeWriter:
             worldbuilding: Worldbuilding details
             writing_goals: Writing goals
             max_depth: Maximum tree depth
+            max_concurrency: Maximum number of concurrent planning/outline/text requests
             
         Returns:
             Complete generated text
         """
-        logger.info(f"Starting generation for task: {task[:50]}...")
-        logger.info(f"Target word count: {word_count}")
+        tree = self._generate_tree(
+            task=task,
+            word_count=word_count,
+            story_setting=story_setting,
+            character_list=character_list,
+            writing_tone=writing_tone,
+            language_style=language_style,
+            theme=theme,
+            story_structure=story_structure,
+            plot_development=plot_development,
+            worldbuilding=worldbuilding,
+            writing_goals=writing_goals,
+            max_depth=max_depth,
+            max_concurrency=max_concurrency
+        )
         
-        # Phase 1: Build tree structure
-        logger.info("Phase 1: Building writing tree...")
-        tree = self.planning_agent.build_tree(
+        return self._final_text(tree, word_count)
+    
+    def generate_stream(
+        self,
+        task: str,
+        word_count: int,
+        story_setting: Optional[str] = None,
+        character_list: Optional[List[str]] = None,
+        writing_tone: Optional[str] = None,
+        language_style: Optional[str] = None,
+        theme: Optional[str] = None,
+        story_structure: Optional[str] = None,
+        plot_development: Optional[str] = None,
+        worldbuilding: Optional[str] = None,
+        writing_goals: Optional[str] = None,
+        max_depth: int = 10,
+        max_concurrency: int = 8
+    ) -> Iterator[str]:
+        """Generate long text for the given task as a stream of chunks.
+        
+        Planning, outlining and writing run to completion before the first
+        chunk is produced; the final text is then yielded segment by segment
+        instead of being joined into one string. Joining all chunks gives the
+        same text as generate().
+        
+        Args:
+            task: Overall writing task description
+            word_count: Target word count
+            story_setting: Story setting
+            character_list: List of characters
+            writing_tone: Writing tone
+            language_style: Language style
+            theme: Core theme
+            story_structure: Story structure
+            plot_development: Plot development
+            worldbuilding: Worldbuilding details
+            writing_goals: Writing goals
+            max_depth: Maximum tree depth
+            max_concurrency: Maximum number of concurrent planning/outline/text requests
+            
+        Yields:
+            Chunks of the generated text, in reading order
+        """
+        tree = self._generate_tree(
+            task=task,
+            word_count=word_count,
+            story_setting=story_setting,
+            character_list=character_list,
+            writing_tone=writing_tone,
+            language_style=language_style,
+            theme=theme,
+            story_structure=story_structure,
+            plot_development=plot_development,
+            worldbuilding=worldbuilding,
+            writing_goals=writing_goals,
+            max_depth=max_depth,
+            max_concurrency=max_concurrency
+        )
+        
+        # Phase 4: Stream text
+        logger.info("Phase 4: Streaming text...")
+        for i, segment in enumerate(self._iter_text_segments(tree)):
+            if i:
+                yield "\n\n"
+            yield segment
+    
+    async def agenerate(
+        self,
+        task: str,
+        word_count: int,
+        story_setting: Optional[str] = None,
+        character_list: Optional[List[str]] = None,
+        writing_tone: Optional[str] = None,
+        language_style: Optional[str] = None,
+        theme: Optional[str] = None,
+        story_structure: Optional[str] = None,
+        plot_development: Optional[str] = None,
+        worldbuilding: Optional[str] = None,
+        writing_goals: Optional[str] = None,
+        max_depth: int = 10,
+        max_concurrency: int = 8
+    ) -> str:
+        """Generate long text for the given task using asyncio.
+        
+        Planning runs in a worker thread. Outlines and texts are requested
+        through AsyncOpenAI from the event loop, at most max_concurrency at
+        a time, instead of holding one thread per in-flight request. The
+        result is the same text generate() would produce.
+        
+        Args:
+            task: Overall writing task description
+            word_count: Target word count
+            story_setting: Story setting
+            character_list: List of characters
+            writing_tone: Writing tone
+            language_style: Language style
+            theme: Core theme
+            story_structure: Story structure
+            plot_development: Plot development
+            worldbuilding: Worldbuilding details
+            writing_goals: Writing goals
+            max_depth: Maximum tree depth
+            max_concurrency: Maximum number of concurrent planning/outline/text requests
+            
+        Returns:
+            Complete generated text
+        """
+        loop = asyncio.get_running_loop()
+        tree, leaf_nodes = await loop.run_in_executor(None, functools.partial(
+            self._plan_tree,
             root_task=task,
             word_count=word_count,
             story_setting=story_setting,
@@ -117,46 +357,426 @@ class TreeWriter:
             plot_development=plot_development,
             worldbuilding=worldbuilding,
             writing_goals=writing_goals,
-            max_depth=max_depth
+            max_depth=max_depth,
+            max_concurrency=max_concurrency
+        ))
+        
+        async with create_async_http_client() as http_client:
+            clients = {
+                name: get_async_client(getattr(self, name).model_config, http_client)
+                for name in {step.model for step in _LEAF_STEPS}
+            }
+            for step in _LEAF_STEPS:
+                # Selection may run a blocking batch job
+                node_names = await loop.run_in_executor(None, self._select_leaves, step, tree, leaf_nodes)
+                await self._arun_per_leaf(
+                    functools.partial(self._arun_leaf_step, step),
+                    clients[step.model], tree, node_names, max_concurrency
+                )
+        
+        return self._final_text(tree, word_count)
+    
+    def _generate_tree(
+        self,
+        task: str,
+        word_count: int,
+        story_setting: Optional[str] = None,
+        character_list: Optional[List[str]] = None,
+        writing_tone: Optional[str] = None,
+        language_style: Optional[str] = None,
+        theme: Optional[str] = None,
+        story_structure: Optional[str] = None,
+        plot_development: Optional[str] = None,
+        worldbuilding: Optional[str] = None,
+        writing_goals: Optional[str] = None,
+        max_depth: int = 10,
+        max_concurrency: int = 8
+    ) -> WritingTree:
+        """Run planning, outline and writing phases.
+        
+        Args:
+            task: Overall writing task description
+            word_count: Target word count
+            story_setting: Story setting
+            character_list: List of characters
+            writing_tone: Writing tone
+            language_style: Language style
+            theme: Core theme
+            story_structure: Story structure
+            plot_development: Plot development
+            worldbuilding: Worldbuilding details
+            writing_goals: Writing goals
+            max_depth: Maximum tree depth
+            max_concurrency: Maximum number of concurrent planning/outline/text requests
+            
+        Returns:
+            Writing tree with outlines and generated text on its leaves
+        """
+        tree, leaf_nodes = self._plan_tree(
+            root_task=task,
+            word_count=word_count,
+            story_setting=story_setting,
+            character_list=character_list,
+            writing_tone=writing_tone,
+            language_style=language_style,
+            theme=theme,
+            story_structure=story_structure,
+            plot_development=plot_development,
+            worldbuilding=worldbuilding,
+            writing_goals=writing_goals,
+            max_depth=max_depth,
+            max_concurrency=max_concurrency
         )
         
-        leaf_nodes = tree.get_leaf_nodes()
+        # Phases 2 and 3 make independent, I/O-bound calls per leaf, so they
+        # run in a thread pool; each worker writes its result to the tree
+        for step in _LEAF_STEPS:
+            node_names = self._select_leaves(step, tree, leaf_nodes)
+            self._run_per_leaf(functools.partial(self._run_leaf_step, step), tree, node_names, max_concurrency)
+        
+        return tree
+    
+    def _plan_tree(self, **build_kwargs: Any) -> Tuple[WritingTree, List[str]]:
+        """Run Phase 1 and build the writing tree.
+        
+        Args:
+            **build_kwargs: Keyword arguments for PlanningAgent.build_tree
+            
+        Returns:
+            The writing tree and its leaf nodes in reading order
+        """
+        logger.info(f"Starting generation for task: {build_kwargs['root_task'][:50]}...")
+        logger.info(f"Target word count: {build_kwargs['word_count']}")
+        
+        logger.info("Phase 1: Building writing tree...")
+        if self.oneshot_planning:
+            build_tree = self.planning_agent.build_tree_oneshot
+        else:
+            build_tree = self.planning_agent.build_tree
+        
+        tree = build_tree(**build_kwargs)
+        
+        # Leaves in reading order, shared by Phases 2 and 3
+        leaf_nodes = list(tree.traverse_dfs_leaves_only())
         logger.info(f"Tree built: {len(tree)} nodes, {len(leaf_nodes)} leaves")
+        return tree, leaf_nodes
+    
+    def _select_leaves(self, step: _LeafStep, tree: WritingTree, leaf_nodes: List[str]) -> List[str]:
+        """List the leaves a step still has to generate per leaf.
         
-        # Phase 2: Generate outlines for leaf nodes
-        logger.info("Phase 2: Generating outlines...")
-        for i, node_name in enumerate(leaf_nodes, 1):
-            logger.info(f"Generating outline {i}/{len(leaf_nodes)} for '{node_name}'")
-            node = tree.get_node(node_name)
+        With the Batch API enabled, batchable steps first request the
+        selected leaves as one batch job; only the leaves it did not cover
+        fall back to per-leaf requests.
+        
+        Args:
+            step: Per-leaf generation step
+            tree: Writing tree
+            leaf_nodes: All leaf nodes of the tree, in reading order
+            
+        Returns:
+            Leaves to run the step on
+        """
+        if step.phase:
+            logger.info(step.phase)
+        
+        node_names = getattr(self, step.select)(tree, leaf_nodes)
+        if self.use_batch_api and step.batch is not None:
+            getattr(self, step.batch)(tree, node_names)
+            field = step.fields[-1]
+            node_names = [n for n in node_names if not tree.nodes[n][field]]
+        return node_names
+    
+    def _outline_leaves(self, tree: WritingTree, leaf_nodes: List[str]) -> List[str]:
+        """List leaves that still need an outline.
+        
+        Args:
+            tree: Writing tree
+            leaf_nodes: All leaf nodes of the tree
+            
+        Returns:
+            Leaves without an outline, e.g. those whose fused call failed
+        """
+        nodes = tree.nodes
+        return [n for n in leaf_nodes if not nodes[n]["outline"]]
+    
+    def _small_leaves(self, tree: WritingTree, leaf_nodes: List[str]) -> List[str]:
+        """List leaves small enough for a fused outline and text call.
+        
+        Args:
+            tree: Writing tree
+            leaf_nodes: All leaf nodes of the tree
             
-            try:
-                outline = self.thinking_model.generate_outline(node, tree)
-                tree.update_node_metadata(node_name, outline=outline)
-                logger.debug(f"Outline generated for '{node_name}'")
-            except Exception as e:
-                logger.error(f"Failed to generate outline for '{node_name}': {e}")
-                # Continue with other nodes
-        
-        # Phase 3: Generate text for leaf nodes
-        logger.info("Phase 3: Generating text...")
-        for i, node_name in enumerate(leaf_nodes, 1):
-            logger.info(f"Generating text {i}/{len(leaf_nodes)} for '{node_name}'")
+        Returns:
+            Leaves below fuse_word_count, or none if fusion is disabled or
+            the writing model uses a custom prompt template
+        """
+        if not self.fuse_word_count or self.writing_model.fused_template is None:
+            return []
+        nodes = tree.nodes
+        return [n for n in leaf_nodes if nodes[n]["word_count"] < self.fuse_word_count]
+    
+    def _batch_outlines(self, tree: WritingTree, leaf_nodes: List[str]) -> None:
+        """Request the outlines of all leaves as one batch job.
+        
+        Args:
+            tree: Writing tree
+            leaf_nodes: Leaf nodes to outline
+        """
+        self._run_batch(
+            self.thinking_model.client,
+            {
+                node_name: self.thinking_model.build_request(tree.get_node(node_name), tree)
+                for node_name in leaf_nodes
+            },
+            tree,
+            "outline"
+        )
+    
+    def _batch_texts(self, tree: WritingTree, leaf_nodes: List[str]) -> None:
+        """Request the text of leaves as one batch job.
+        
+        Args:
+            tree: Writing tree
+            leaf_nodes: Leaf nodes with an outline to write
+        """
+        requests = {}
+        for node_name in leaf_nodes:
             node = tree.get_node(node_name)
-            outline = node.get("outline")
+            requests[node_name] = self.writing_model.build_request(node, node["outline"], tree)
+        self._run_batch(self.writing_model.client, requests, tree, "generated_text")
+    
+    def _ready_leaves(self, tree: WritingTree, leaf_nodes: List[str]) -> List[str]:
+        """List leaves ready for text generation, warning about the rest.
+        
+        Args:
+            tree: Writing tree
+            leaf_nodes: All leaf nodes of the tree
             
-            if not outline:
+        Returns:
+            Leaves with an outline but no generated text
+        """
+        for node_name in leaf_nodes:
+            if not tree.nodes[node_name]["outline"]:
                 logger.warning(f"No outline for '{node_name}', skipping text generation")
-                continue
+        return list(tree.iter_ready_leaves())
+    
+    def _run_per_leaf(
+        self,
+        func: Callable[[WritingTree, str, int, int], Optional[str]],
+        tree: WritingTree,
+        node_names: List[str],
+        max_concurrency: int
+    ) -> None:
+        """Run a per-leaf generation step concurrently.
+        
+        Args:
+            func: Step taking (tree, node_name, index, total)
+            tree: Writing tree
+            node_names: Leaf nodes to process
+            max_concurrency: Maximum number of concurrent calls
+        """
+        total = len(node_names)
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            futures = [
+                executor.submit(func, tree, node_name, i, total)
+                for i, node_name in enumerate(node_names, 1)
+            ]
+            for future in as_completed(futures):
+                future.result()
+    
+    def _run_batch(
+        self,
+        client: OpenAI,
+        requests: Dict[str, Dict[str, Any]],
+        tree: WritingTree,
+        field: str
+    ) -> None:
+        """Run per-leaf requests as one batch job and store the results.
+        
+        A failed batch is logged and leaves the tree unchanged, so the
+        caller can fall back to per-leaf requests.
+        
+        Args:
+            client: OpenAI client to submit the batch with
+            requests: Mapping of leaf node name to chat completion request
+            tree: Writing tree
+            field: Metadata field to store each response in
+        """
+        if not requests:
+            return
+        
+        logger.info(f"Submitting batch of {len(requests)} requests for '{field}'")
+        try:
+            results = run_batch(client, requests, timeout=self.batch_timeout)
+        except Exception as e:
+            logger.warning(f"Batch request failed, falling back to per-leaf requests: {e}")
+            return
+        
+        for node_name, content in results.items():
+            if node_name in requests:
+                tree.update_node_metadata(node_name, **{field: content})
+        
+        logger.info(f"Batch completed: {len(results)}/{len(requests)} requests succeeded")
+    
+    def _run_leaf_step(
+        self,
+        step: _LeafStep,
+        tree: WritingTree,
+        node_name: str,
+        index: int,
+        total: int
+    ) -> Optional[str]:
+        """Run a generation step on one leaf and store its result.
+        
+        Errors are logged and swallowed so one failing leaf does not stop
+        the others.
+        
+        Args:
+            step: Per-leaf generation step
+            tree: Writing tree
+            node_name: Name of leaf node to process
+            index: 1-based position of the leaf, for progress logging
+            total: Number of leaves being processed
             
-            try:
-                text = self.writing_model.generate_text(node, outline, tree)
-                tree.update_node_metadata(node_name, generated_text=text)
-                logger.debug(f"Text generated for '{node_name}'")
-            except Exception as e:
-                logger.error(f"Failed to generate text for '{node_name}': {e}")
-                # Continue with other nodes
+        Returns:
+            The generated outline or text, or None if generation failed
+        """
+        model, args = self._begin_leaf_step(step, tree, node_name, index, total)
+        try:
+            result = getattr(model, step.method)(*args)
+        except Exception as e:
+            return self._leaf_step_failed(step, node_name, e)
+        return self._store_leaf_result(step, tree, node_name, result)
+    
+    def _begin_leaf_step(
+        self,
+        step: _LeafStep,
+        tree: WritingTree,
+        node_name: str,
+        index: int,
+        total: int
+    ) -> Tuple[Any, Tuple[Any, ...]]:
+        """Log progress and get the model and arguments for a leaf's call.
         
-        # Phase 4: Concatenate text
+        Args:
+            step: Per-leaf generation step
+            tree: Writing tree
+            node_name: Name of leaf node to process
+            index: 1-based position of the leaf, for progress logging
+            total: Number of leaves being processed
+            
+        Returns:
+            Tuple of (model, positional arguments of its generation method)
+        """
+        logger.info(f"Generating {step.label} {index}/{total} for '{node_name}'")
+        node = tree.get_node(node_name)
+        if step.pass_outline:
+            return getattr(self, step.model), (node, node["outline"], tree)
+        return getattr(self, step.model), (node, tree)
+    
+    def _leaf_step_failed(self, step: _LeafStep, node_name: str, error: Exception) -> None:
+        """Log a leaf whose generation step failed.
+        
+        Args:
+            step: Per-leaf generation step
+            node_name: Name of the failed leaf node
+            error: Error raised by the model
+        """
+        message = step.failure.format(label=step.label, node_name=node_name)
+        logger.log(step.failure_level, f"{message}: {error}")
+    
+    def _store_leaf_result(
+        self,
+        step: _LeafStep,
+        tree: WritingTree,
+        node_name: str,
+        result: Any
+    ) -> str:
+        """Store a leaf's generated outline and/or text in the tree.
+        
+        Args:
+            step: Per-leaf generation step
+            tree: Writing tree
+            node_name: Name of leaf node
+            result: Return value of the model's generation method
+            
+        Returns:
+            The last stored value (the text if the step generates one)
+        """
+        values = result if len(step.fields) > 1 else (result,)
+        tree.update_node_metadata(node_name, **dict(zip(step.fields, values)))
+        logger.debug(f"Generated {step.label} for '{node_name}'")
+        return values[-1]
+    
+    async def _arun_per_leaf(
+        self,
+        func: Callable[[AsyncOpenAI, WritingTree, str, int, int], Awaitable[Optional[str]]],
+        client: AsyncOpenAI,
+        tree: WritingTree,
+        node_names: List[str],
+        max_concurrency: int
+    ) -> None:
+        """Run a per-leaf generation step as concurrent coroutines.
+        
+        Args:
+            func: Coroutine function taking (client, tree, node_name, index, total)
+            client: Async OpenAI client to send requests with
+            tree: Writing tree
+            node_names: Leaf nodes to process
+            max_concurrency: Maximum number of in-flight requests
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        total = len(node_names)
+        
+        async def run(node_name: str, index: int) -> None:
+            async with semaphore:
+                await func(client, tree, node_name, index, total)
+        
+        await asyncio.gather(*(
+            run(node_name, i) for i, node_name in enumerate(node_names, 1)
+        ))
+    
+    async def _arun_leaf_step(
+        self,
+        step: _LeafStep,
+        client: AsyncOpenAI,
+        tree: WritingTree,
+        node_name: str,
+        index: int,
+        total: int
+    ) -> Optional[str]:
+        """Run a generation step on one leaf asynchronously and store its result.
+        
+        Async counterpart of _run_leaf_step.
+        
+        Args:
+            step: Per-leaf generation step
+            client: Async OpenAI client to send the request with
+            tree: Writing tree
+            node_name: Name of leaf node to process
+            index: 1-based position of the leaf, for progress logging
+            total: Number of leaves being processed
+            
+        Returns:
+            The generated outline or text, or None if generation failed
+        """
+        model, args = self._begin_leaf_step(step, tree, node_name, index, total)
+        try:
+            result = await getattr(model, "a" + step.method)(*args, client)
+        except Exception as e:
+            return self._leaf_step_failed(step, node_name, e)
+        return self._store_leaf_result(step, tree, node_name, result)
+    
+    def _final_text(self, tree: WritingTree, word_count: int) -> str:
+        """Run Phase 4 and join the generated text.
+        
+        Args:
+            tree: Writing tree with generated text
+            word_count: Target word count, for logging
+            
+        Returns:
+            Complete generated text
+        """
         logger.info("Phase 4: Concatenating text...")
         final_text = self._concatenate_text(tree)
         
@@ -165,6 +785,22 @@ class TreeWriter:
         
         return final_text
     
+    def _iter_text_segments(self, tree: WritingTree) -> Iterator[str]:
+        """Iterate over generated leaf texts in DFS order.
+        
+        Args:
+            tree: Writing tree with generated text
+            
+        Yields:
+            Generated text of each leaf node that has any
+        """
+        # Read metadata in place; get_node() would copy every node's dict
+        nodes = tree.nodes
+        for node_name in tree.traverse_dfs_leaves_only():
+            text = nodes[node_name]["generated_text"]
+            if text:
+                yield text
+    
     def _concatenate_text(self, tree: WritingTree) -> str:
         """Concatenate text from leaf nodes in DFS order.
         
@@ -174,19 +810,16 @@ class TreeWriter:
         Returns:
             Concatenated text
         """
-        text_segments = []
-        
-        # Traverse tree in DFS order
-        for node_name in tree.traverse_dfs():
-            node = tree.get_node(node_name)
-            
-            # Only include leaf nodes with generated text
-            if node.get("node_type") == "leaf" and node.get("generated_text"):
-                text_segments.append(node["generated_text"])
+        # Write segments straight into one buffer instead of collecting a
+        # list of them first
+        buffer = io.StringIO()
+        segment_count = 0
+        for segment in self._iter_text_segments(tree):
+            if segment_count:
+                buffer.write("\n\n")
+            buffer.write(segment)
+            segment_count += 1
         
-        # Join with double newlines
-        final_text = "\n\n".join(text_segments)
+        logger.info(f"Concatenated {segment_count} text segments")
         
-        logger.info(f"Concatenated {len(text_segments)} text segments")
-        
-        return final_text
+        return buffer.getvalue()
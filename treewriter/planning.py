@@ -1,18 +1,52 @@
 """Planning agent for recursive tree generation."""
 
+import copy
+import hashlib
 import json
-import re
-from typing import Dict, List, Tuple, Optional
-from openai import OpenAI
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple, Optional
+from openai import DefaultHttpxClient
 
 from .config import ModelConfig, ThresholdConfig
 from .tree import WritingTree
-from .prompts import get_planning_prompt, format_template
-from .utils import setup_logger, GenerationError, ConfigurationError
+from .cache import DecisionCache, PlanCache, PLAN_EMBEDDING_MODEL
+from .llm import call_with_retry, get_client
+from .prompts import (
+    get_planning_prompt,
+    get_planning_system_prompt,
+    get_planning_user_prompt,
+    get_forced_decomposition_prompt,
+    get_planning_oneshot_prompt,
+    get_plan_adapt_prompt,
+    compile_template,
+    format_template,
+    get_unspecified,
+    node_prompt_vars,
+)
+from .utils import setup_logger, allocate_word_counts, extract_json, GenerationError, ConfigurationError
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional
+    _json_loads = json.loads
 
 
 logger = setup_logger(__name__)
 
+# Maximum number of parsed agent decisions kept in memory per agent
+DECISION_CACHE_SIZE = 1024
+
+def _unparsed_decision() -> Dict[str, Any]:
+    """Get the decision used when an agent response can't be parsed.
+    
+    Returns:
+        Decision that does not decompose the node
+    """
+    return {"should_decompose": False, "reasoning": "Failed to parse response", "children": []}
+
 
 class PlanningAgent:
     """Planning agent that recursively decomposes writing tasks.
@@ -26,6 +60,9 @@ class PlanningAgent:
         threshold_config: Configuration for threshold-based checks
         prompt_template: Prompt template for the planning agent
         client: OpenAI client (for API models)
+        plan_cache: Cache of plans from earlier tasks, or None if disabled
+        decision_store: Persistent store of agent decisions, or None if
+            decisions are only cached in memory
     """
     
     def __init__(
@@ -33,7 +70,9 @@ class PlanningAgent:
         model_config: ModelConfig,
         threshold_config: ThresholdConfig,
         prompt_template: Optional[str] = None,
-        language: str = "cn"
+        language: str = "cn",
+        plan_cache: Optional[PlanCache] = None,
+        http_client: Optional[DefaultHttpxClient] = None
     ):
         """Initialize planning agent.
         
@@ -42,6 +81,9 @@ class PlanningAgent:
             threshold_config: Threshold configuration
             prompt_template: Custom prompt template (optional)
             language: Language for prompts ("cn" or "en")
+            plan_cache: Plan cache to use (optional); one is opened at
+                threshold_config.plan_cache_path if plan_cache_enabled is set
+            http_client: Shared HTTP client for API requests (optional)
             
         Raises:
             ConfigurationError: If configuration is invalid
@@ -56,19 +98,53 @@ class PlanningAgent:
         self.model_config = model_config
         self.threshold_config = threshold_config
         self.language = language
+        self._unspecified = get_unspecified(language)
+        # Threshold settings shared by every planning prompt
+        self._threshold_vars = {
+            "max_word_count": threshold_config.max_word_count,
+            "min_children": threshold_config.min_children,
+            "max_children": threshold_config.max_children,
+        }
         
         # Set prompt template
         if prompt_template:
+            # A custom template is sent as a single user message
             self.prompt_template = prompt_template
+            self._system_prompt = None
+            self._user_template = prompt_template
         else:
             self.prompt_template = get_planning_prompt(language)
+            # Static instructions are formatted once into a system message that
+            # is byte-identical across calls, so providers can cache the prefix
+            self._system_prompt = format_template(
+                get_planning_system_prompt(language),
+                **self._threshold_vars
+            )
+            self._user_template = get_planning_user_prompt(language)
+        # Parsed once; formatted for every planning call
+        try:
+            self._render_user_prompt = compile_template(self._user_template)
+        except ValueError as e:
+            raise ConfigurationError(f"Invalid prompt template: {e}")
+        self.forced_template = get_forced_decomposition_prompt(language)
+        self.oneshot_template = get_planning_oneshot_prompt(language)
+        self.plan_adapt_template = get_plan_adapt_prompt(language)
+        
+        if plan_cache is None and threshold_config.plan_cache_enabled:
+            plan_cache = PlanCache(threshold_config.plan_cache_path)
+        self.plan_cache = plan_cache
+        
+        # Parsed agent decisions keyed by prompt hash, in LRU order
+        self._decision_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._decision_lock = threading.Lock()
+        if threshold_config.decision_cache_path:
+            self.decision_store = DecisionCache(threshold_config.decision_cache_path)
+        else:
+            self.decision_store = None
         
         # Initialize model client
         if model_config.model_type == "api":
-            self.client = OpenAI(
-                api_key=model_config.api_key,
-                base_url=model_config.api_endpoint
-            )
+            self.client = get_client(model_config, http_client)
         else:
             # For local models, we'll need to implement later
             raise NotImplementedError("Local model support not yet implemented")
@@ -84,21 +160,52 @@ class PlanningAgent:
         Returns:
             True if node should be decomposed based on threshold
         """
+        return self.threshold_decision(node) != "skip"
+    
+    def threshold_decision(self, node: Dict) -> str:
+        """Classify a node by word count for the decomposition decision.
+        
+        Args:
+            node: Node metadata dictionary
+            
+        Returns:
+            "force" if the node must be decomposed, "skip" if it must not be,
+            or "ask" if the agent should decide
+        """
         word_count = node.get("word_count", 0)
         
         # Must decompose if above max threshold
         if word_count > self.threshold_config.max_word_count:
             logger.debug(f"Threshold check: DECOMPOSE (word_count {word_count} > {self.threshold_config.max_word_count})")
-            return True
+            return "force"
         
         # Don't decompose if below min threshold
         if word_count < self.threshold_config.min_word_count:
             logger.debug(f"Threshold check: NO DECOMPOSE (word_count {word_count} < {self.threshold_config.min_word_count})")
-            return False
+            return "skip"
         
         # In between: let agent decide
         logger.debug(f"Threshold check: AGENT DECIDES (word_count {word_count} in range)")
-        return True
+        return "ask"
+    
+    def _build_messages(self, node: Dict) -> List[Dict[str, str]]:
+        """Build the chat messages for a planning call on a node.
+        
+        Args:
+            node: Node metadata dictionary
+            
+        Returns:
+            System message with the static instructions (unless a custom
+            template is used) followed by the user message for the node
+        """
+        prompt_vars = node_prompt_vars(node, self._unspecified)
+        prompt_vars.update(self._threshold_vars)
+        
+        messages = []
+        if self._system_prompt is not None:
+            messages.append({"role": "system", "content": self._system_prompt})
+        messages.append({"role": "user", "content": self._render_user_prompt(prompt_vars)})
+        return messages
     
     def should_decompose_agent(
         self,
@@ -118,41 +225,7 @@ class PlanningAgent:
             GenerationError: If LLM generation fails
         """
         try:
-            # Prepare prompt variables
-            prompt_vars = {
-                "content": node.get("content", ""),
-                "word_count": node.get("word_count", 0),
-                "story_setting": node.get("story_setting", "未指定"),
-                "character_list": str(node.get("character_list", [])),
-                "writing_tone": node.get("writing_tone", "未指定"),
-                "language_style": node.get("language_style", "未指定"),
-                "theme": node.get("theme", "未指定"),
-                "story_structure": node.get("story_structure", "未指定"),
-                "plot_development": node.get("plot_development", "未指定"),
-                "worldbuilding": node.get("worldbuilding", "未指定"),
-                "writing_goals": node.get("writing_goals", "未指定"),
-                "max_word_count": self.threshold_config.max_word_count,
-                "min_children": self.threshold_config.min_children,
-                "max_children": self.threshold_config.max_children,
-            }
-            
-            # Format prompt
-            prompt = format_template(self.prompt_template, **prompt_vars)
-            
-            # Call LLM
-            response = self.client.chat.completions.create(
-                model=self.model_config.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.model_config.temperature,
-                top_p=self.model_config.top_p,
-                max_tokens=self.model_config.max_tokens
-            )
-            
-            response_text = response.choices[0].message.content
-            logger.debug(f"Agent response: {response_text[:200]}...")
-            
-            # Parse JSON response
-            decision = self._parse_agent_response(response_text)
+            decision = self._call_agent(self._build_messages(node))
             
             should_decompose = decision.get("should_decompose", False)
             reasoning = decision.get("reasoning", "No reasoning provided")
@@ -170,6 +243,93 @@ class PlanningAgent:
                 context={"node": node}
             )
     
+    def _call_agent(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Get the agent's parsed decision for a planning prompt.
+        
+        Decisions are memoized by a hash of the model settings and messages,
+        in memory and, if configured, in the persistent decision store. Calls
+        with an identical prompt, such as an unchanged node planned again,
+        make a single API request. A failing decision store is logged and
+        bypassed; it never changes the decision.
+        
+        Args:
+            messages: Chat messages from _build_messages
+            
+        Returns:
+            Decision dictionary; callers may modify it freely
+        """
+        # Stored decisions outlive the run, so every setting that changes
+        # the response is part of the key
+        key_payload = [
+            self.model_config.model_name,
+            self.model_config.api_endpoint,
+            self.model_config.temperature,
+            self.model_config.top_p,
+            self.model_config.max_tokens,
+            messages,
+        ]
+        key = hashlib.blake2b(
+            json.dumps(key_payload, ensure_ascii=False).encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        
+        with self._decision_lock:
+            decision = self._decision_cache.get(key)
+            if decision is not None:
+                self._decision_cache.move_to_end(key)
+        
+        if decision is None and self.decision_store is not None:
+            try:
+                decision = self.decision_store.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Decision store lookup failed: {e}")
+            if decision is not None:
+                self._remember_decision(key, decision)
+        
+        if decision is not None:
+            logger.debug("Agent decision served from cache")
+            return copy.deepcopy(decision)
+        
+        response = call_with_retry(
+            self.client.chat.completions.create,
+            model=self.model_config.model_name,
+            messages=messages,
+            temperature=self.model_config.temperature,
+            top_p=self.model_config.top_p,
+            max_tokens=self.model_config.max_tokens
+        )
+        
+        response_text = response.choices[0].message.content
+        logger.debug(f"Agent response: {response_text[:200]}...")
+        
+        decision = self._extract_decision(response_text)
+        if decision is None:
+            # Unparseable responses are not cached, so a retry asks again
+            logger.warning("Could not parse JSON from response, defaulting to no decomposition")
+            return _unparsed_decision()
+        
+        self._remember_decision(key, decision)
+        if self.decision_store is not None:
+            try:
+                self.decision_store.put(key, decision)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to store decision: {e}")
+        
+        return copy.deepcopy(decision)
+    
+    def _remember_decision(self, key: str, decision: Dict[str, Any]) -> None:
+        """Add a decision to the in-memory LRU cache.
+        
+        Args:
+            key: Prompt hash
+            decision: Parsed decision
+        """
+        with self._decision_lock:
+            self._decision_cache[key] = decision
+            self._decision_cache.move_to_end(key)
+            if len(self._decision_cache) > DECISION_CACHE_SIZE:
+                self._decision_cache.popitem(last=False)
+    
     def _parse_agent_response(self, response_text: str) -> Dict:
         """Parse agent response to extract decision.
         
@@ -179,114 +339,147 @@ class PlanningAgent:
         Returns:
             Dictionary with decision and reasoning
         """
-        # Try to extract JSON from response
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Try to find JSON without code blocks
-            json_match = re.search(r'\{.*"should_decompose".*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-            else:
-                # Fallback: assume no decomposition if can't parse
-                logger.warning("Could not parse JSON from response, defaulting to no decomposition")
-                return {"should_decompose": False, "reasoning": "Failed to parse response", "children": []}
+        decision = self._extract_decision(response_text)
+        if decision is None:
+            # Fallback: assume no decomposition if can't parse
+            logger.warning("Could not parse JSON from response, defaulting to no decomposition")
+            return _unparsed_decision()
+        return decision
+    
+    def _extract_decision(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """Extract the JSON decision object from an agent response.
+        
+        Args:
+            response_text: Raw response from LLM
+            
+        Returns:
+            Decision dictionary, or None if no JSON object could be parsed
+        """
+        json_str = extract_json(response_text)
+        if json_str is None:
+            return None
         
         try:
-            decision = json.loads(json_str)
-            return decision
+            decision = _json_loads(json_str)
         except json.JSONDecodeError as e:
-            logger.warning(f"JSON decode error: {e}, defaulting to no decomposition")
-            return {"should_decompose": False, "reasoning": "JSON parse error", "children": []}
+            logger.warning(f"JSON decode error: {e}")
+            return None
+        
+        return decision if isinstance(decision, dict) else None
+    
+    def _validate_children(
+        self,
+        children: List[Dict],
+        parent_words: int
+    ) -> List[Dict]:
+        """Check proposed children against the thresholds.
+        
+        Children beyond max_children are dropped, and word counts that stray
+        more than 10% from the parent are rescaled to sum to it exactly.
+        
+        Args:
+            children: Child specifications; word counts are normalized in place
+            parent_words: Word count of the parent node
+            
+        Returns:
+            The children to add, or an empty list if there are too few
+            
+        Raises:
+            TypeError: If a child's word count is not a number
+        """
+        if len(children) < self.threshold_config.min_children:
+            logger.warning(f"Too few children ({len(children)}), marking as leaf")
+            return []
+        
+        if len(children) > self.threshold_config.max_children:
+            logger.warning(f"Too many children ({len(children)}), truncating")
+            children = children[:self.threshold_config.max_children]
+        
+        # Word counts may come back as floats, which is valid JSON;
+        # non-numeric counts raise and fail the decomposition
+        for child in children:
+            child["word_count"] = int(round(child.get("word_count") or 0))
+        
+        # Validate word count conservation
+        total_child_words = sum(child["word_count"] for child in children)
+        
+        if abs(total_child_words - parent_words) > parent_words * 0.1:  # Allow 10% deviation
+            logger.warning(
+                f"Word count mismatch: parent={parent_words}, "
+                f"children_sum={total_child_words}, adjusting..."
+            )
+            # Rescale proportionally; the counts sum exactly to the
+            # parent, so rounding does not drift down the tree
+            if total_child_words > 0:
+                counts = allocate_word_counts(
+                    [child["word_count"] for child in children],
+                    parent_words
+                )
+                for child, count in zip(children, counts):
+                    child["word_count"] = count
+        
+        return children
     
     def decompose_node(
         self,
         node_name: str,
-        tree: WritingTree
-    ) -> List[Dict]:
-        """Decompose a node into child nodes.
+        tree: WritingTree,
+        *,
+        node: Optional[Dict] = None,
+        force: bool = False
+    ) -> Tuple[bool, str, List[Dict]]:
+        """Decide whether to decompose a node and generate its children.
+        
+        The planning prompt asks for the decision and the children together,
+        so both come from a single agent call.
         
         Args:
             node_name: Name of node to decompose
             tree: Writing tree
+            node: Metadata of the node, if the caller already fetched it
+            force: Tell the agent that the node must be decomposed
             
         Returns:
-            List of child node specifications
+            Tuple of (should_decompose, reasoning, children); children is
+            empty if the agent generated none or too few
             
         Raises:
             GenerationError: If decomposition fails
         """
-        node = tree.get_node(node_name)
+        if node is None:
+            node = tree.get_node(node_name)
         
         try:
-            # Get decomposition from agent
-            _, reasoning = self.should_decompose_agent(node, tree)
-            
-            # Prepare prompt for decomposition
-            prompt_vars = {
-                "content": node.get("content", ""),
-                "word_count": node.get("word_count", 0),
-                "story_setting": node.get("story_setting", "未指定"),
-                "character_list": str(node.get("character_list", [])),
-                "writing_tone": node.get("writing_tone", "未指定"),
-                "language_style": node.get("language_style", "未指定"),
-                "theme": node.get("theme", "未指定"),
-                "story_structure": node.get("story_structure", "未指定"),
-                "plot_development": node.get("plot_development", "未指定"),
-                "worldbuilding": node.get("worldbuilding", "未指定"),
-                "writing_goals": node.get("writing_goals", "未指定"),
-                "max_word_count": self.threshold_config.max_word_count,
-                "min_children": self.threshold_config.min_children,
-                "max_children": self.threshold_config.max_children,
-            }
-            
-            prompt = format_template(self.prompt_template, **prompt_vars)
-            
-            # Call LLM for decomposition
-            response = self.client.chat.completions.create(
-                model=self.model_config.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.model_config.temperature,
-                top_p=self.model_config.top_p,
-                max_tokens=self.model_config.max_tokens
-            )
+            messages = self._build_messages(node)
+            if force:
+                messages.append({
+                    "role": "user",
+                    "content": format_template(
+                        self.forced_template,
+                        word_count=node.get("word_count", 0),
+                        **self._threshold_vars
+                    )
+                })
+            decision = self._call_agent(messages)
             
-            response_text = response.choices[0].message.content
-            decision = self._parse_agent_response(response_text)
+            should_decompose = bool(decision.get("should_decompose", False))
+            reasoning = decision.get("reasoning", "No reasoning provided")
+            children = decision.get("children") or []
             
-            children = decision.get("children", [])
+            logger.info(f"Agent decision: {'DECOMPOSE' if should_decompose else 'NO DECOMPOSE'}")
+            logger.debug(f"Reasoning: {reasoning}")
             
-            # Validate children
             if not children:
-                logger.warning("No children generated, marking as leaf")
-                return []
+                if should_decompose:
+                    logger.warning("No children generated, marking as leaf")
+                return should_decompose, reasoning, []
             
-            if len(children) < self.threshold_config.min_children:
-                logger.warning(f"Too few children ({len(children)}), marking as leaf")
-                return []
-            
-            if len(children) > self.threshold_config.max_children:
-                logger.warning(f"Too many children ({len(children)}), truncating")
-                children = children[:self.threshold_config.max_children]
-            
-            # Validate word count conservation
-            total_child_words = sum(child.get("word_count", 0) for child in children)
-            parent_words = node.get("word_count", 0)
-            
-            if abs(total_child_words - parent_words) > parent_words * 0.1:  # Allow 10% deviation
-                logger.warning(
-                    f"Word count mismatch: parent={parent_words}, "
-                    f"children_sum={total_child_words}, adjusting..."
-                )
-                # Adjust children word counts proportionally
-                if total_child_words > 0:
-                    ratio = parent_words / total_child_words
-                    for child in children:
-                        child["word_count"] = int(child["word_count"] * ratio)
+            children = self._validate_children(children, node.get("word_count", 0))
+            if not children:
+                return should_decompose, reasoning, []
             
             logger.info(f"Decomposed into {len(children)} children")
-            return children
+            return should_decompose, reasoning, children
             
         except Exception as e:
             logger.error(f"Decomposition failed: {e}")
@@ -309,7 +502,8 @@ class PlanningAgent:
         plot_development: Optional[str] = None,
         worldbuilding: Optional[str] = None,
         writing_goals: Optional[str] = None,
-        max_depth: int = 10
+        max_depth: int = 10,
+        max_concurrency: int = 8
     ) -> WritingTree:
         """Build complete writing tree from root task.
         
@@ -326,6 +520,7 @@ class PlanningAgent:
             worldbuilding: Worldbuilding details
             writing_goals: Writing goals
             max_depth: Maximum tree depth to prevent infinite recursion
+            max_concurrency: Maximum number of nodes planned concurrently
             
         Returns:
             Complete writing tree
@@ -349,77 +544,343 @@ class PlanningAgent:
         
         logger.info(f"Building tree for task: {root_task[:50]}...")
         
-        # Process nodes recursively
-        self._process_node_recursive("root", tree, depth=0, max_depth=max_depth)
+        goal_text = f"{root_task}|{theme}|{story_structure}|{word_count}"
+        # A root below the threshold stays a leaf, so neither look up nor
+        # store a plan for it
+        goal_embedding = None
+        if self.plan_cache is not None and self.should_decompose_threshold(tree.get_node("root")):
+            goal_embedding = self._embed_goal(goal_text)
+        
+        if goal_embedding is not None and self._build_from_cache(
+            tree, goal_embedding, max_depth, max_concurrency
+        ):
+            logger.info("Tree built from cached plan")
+        else:
+            # Expand nodes level by level
+            self._expand_nodes([("root", 0)], tree, max_depth, max_concurrency)
+            
+            if goal_embedding is not None and tree.get_children("root"):
+                try:
+                    self.plan_cache.store(goal_text, goal_embedding, tree.to_plan())
+                except Exception as e:
+                    logger.warning(f"Failed to store plan in cache: {e}")
         
         logger.info(f"Tree building complete: {len(tree)} nodes, {len(tree.get_leaf_nodes())} leaves")
         
         return tree
     
-    def _process_node_recursive(
+    def build_tree_oneshot(
         self,
-        node_name: str,
-        tree: WritingTree,
-        depth: int,
-        max_depth: int
-    ) -> None:
-        """Recursively process a node and its children.
+        root_task: str,
+        word_count: int,
+        story_setting: Optional[str] = None,
+        character_list: Optional[List[str]] = None,
+        writing_tone: Optional[str] = None,
+        language_style: Optional[str] = None,
+        theme: Optional[str] = None,
+        story_structure: Optional[str] = None,
+        plot_development: Optional[str] = None,
+        worldbuilding: Optional[str] = None,
+        writing_goals: Optional[str] = None,
+        max_depth: int = 10,
+        max_concurrency: int = 8
+    ) -> WritingTree:
+        """Build complete writing tree from a single planning call.
+        
+        The LLM is asked for the whole tree as nested JSON at once, instead
+        of two calls per internal node. Leaves of that plan that are still
+        far too long are decomposed recursively, and the whole tree is
+        planned recursively if the one-shot plan can't be used.
         
         Args:
-            node_name: Name of node to process
-            tree: Writing tree
-            depth: Current depth in tree
-            max_depth: Maximum allowed depth
+            root_task: Overall writing task description
+            word_count: Target word count
+            story_setting: Story setting
+            character_list: List of characters
+            writing_tone: Writing tone
+            language_style: Language style
+            theme: Core theme
+            story_structure: Story structure
+            plot_development: Plot development
+            worldbuilding: Worldbuilding details
+            writing_goals: Writing goals
+            max_depth: Maximum tree depth
+            max_concurrency: Maximum number of nodes planned concurrently
+            
+        Returns:
+            Complete writing tree
         """
-        if depth >= max_depth:
-            logger.warning(f"Max depth {max_depth} reached, marking as leaf")
-            tree.mark_as_leaf(node_name)
-            return
+        tree = WritingTree()
         
-        node = tree.get_node(node_name)
+        # Add root node
+        tree.add_root_node(
+            content=root_task,
+            word_count=word_count,
+            story_setting=story_setting,
+            character_list=character_list,
+            writing_tone=writing_tone,
+            language_style=language_style,
+            theme=theme,
+            story_structure=story_structure,
+            plot_development=plot_development,
+            worldbuilding=worldbuilding,
+            writing_goals=writing_goals
+        )
         
-        # Step 1: Threshold check
-        threshold_passed = self.should_decompose_threshold(node)
-        tree.update_node_metadata(node_name, decompose_threshold_passed=threshold_passed)
+        logger.info(f"Building tree in one shot for task: {root_task[:50]}...")
         
-        if not threshold_passed:
-            logger.info(f"Node '{node_name}' marked as leaf (threshold check failed)")
-            tree.mark_as_leaf(node_name)
-            return
+        root = tree.get_node("root")
+        if not self.should_decompose_threshold(root):
+            logger.info("Root marked as leaf (threshold check failed)")
+            tree.mark_as_leaf("root")
+            return tree
+        
+        plan = self._plan_oneshot(root, max_depth)
+        if (
+            plan is None
+            or not plan["children"]
+            or not self._materialize_plan(plan, tree, max_depth, max_concurrency)
+        ):
+            logger.warning("One-shot planning failed, falling back to recursive planning")
+            self._expand_nodes([("root", 0)], tree, max_depth, max_concurrency)
+        
+        logger.info(f"Tree building complete: {len(tree)} nodes, {len(tree.get_leaf_nodes())} leaves")
+        
+        return tree
+    
+    def _plan_oneshot(self, node: Dict, max_depth: int) -> Optional[Dict[str, Any]]:
+        """Ask the LLM for the complete plan below a node.
+        
+        Args:
+            node: Node metadata dictionary
+            max_depth: Maximum tree depth
+            
+        Returns:
+            Nested plan dictionary, or None if the call or parsing failed
+        """
+        prompt_vars = node_prompt_vars(node, self._unspecified)
+        prompt_vars.update(self._threshold_vars, max_depth=max_depth)
         
-        # Step 2: Agent check
         try:
-            agent_decision, reasoning = self.should_decompose_agent(node, tree)
-            tree.update_node_metadata(
-                node_name,
-                decompose_agent_decision=agent_decision,
-                decompose_agent_reasoning=reasoning
+            prompt = format_template(self.oneshot_template, **prompt_vars)
+            
+            response = call_with_retry(
+                self.client.chat.completions.create,
+                model=self.model_config.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.model_config.temperature,
+                top_p=self.model_config.top_p,
+                max_tokens=self.model_config.max_tokens
             )
-        except GenerationError as e:
-            logger.error(f"Agent check failed for '{node_name}': {e}")
-            tree.mark_as_leaf(node_name)
-            return
+            
+            response_text = response.choices[0].message.content
+            logger.debug(f"One-shot plan response: {response_text[:200]}...")
+        except Exception as e:
+            logger.error(f"One-shot planning call failed: {e}")
+            return None
         
-        # Step 3: Decide whether to decompose
-        if not agent_decision:
-            logger.info(f"Node '{node_name}' marked as leaf (agent decision)")
-            tree.mark_as_leaf(node_name)
-            return
+        return self._parse_plan_response(response_text)
+    
+    def _embed_goal(self, goal_text: str) -> Optional[List[float]]:
+        """Embed a goal for plan cache lookups.
         
-        # Step 4: Decompose node
+        Args:
+            goal_text: Goal text built from the root task parameters
+            
+        Returns:
+            Embedding vector, or None if the embedding request failed
+        """
         try:
-            children = self.decompose_node(node_name, tree)
-        except GenerationError as e:
-            logger.error(f"Decomposition failed for '{node_name}': {e}")
-            tree.mark_as_leaf(node_name)
-            return
+            response = call_with_retry(
+                self.client.embeddings.create,
+                model=PLAN_EMBEDDING_MODEL,
+                input=goal_text
+            )
+        except Exception as e:
+            logger.warning(f"Goal embedding failed, plan cache disabled for this task: {e}")
+            return None
+        return response.data[0].embedding
+    
+    def _build_from_cache(
+        self,
+        tree: WritingTree,
+        goal_embedding: List[float],
+        max_depth: int,
+        max_concurrency: int
+    ) -> bool:
+        """Build the tree by adapting the most similar cached plan.
         
-        if not children:
-            logger.info(f"Node '{node_name}' marked as leaf (no children generated)")
-            tree.mark_as_leaf(node_name)
-            return
+        Args:
+            tree: Writing tree containing only the root node
+            goal_embedding: Embedding of the new goal
+            max_depth: Maximum tree depth
+            max_concurrency: Maximum number of nodes planned concurrently
+            
+        Returns:
+            True if the tree was built from a cached plan, False if there was
+            no similar plan or adapting it failed
+        """
+        try:
+            match = self.plan_cache.lookup(goal_embedding, self.threshold_config.plan_cache_similarity)
+            if match is None:
+                return False
+            
+            similarity, cached_plan = match
+            logger.info(f"Found cached plan (similarity {similarity:.3f}), adapting it")
+            
+            root = tree.get_node("root")
+            prompt = format_template(
+                self.plan_adapt_template,
+                content=root.get("content", ""),
+                word_count=root.get("word_count", 0),
+                story_setting=root.get("story_setting") or self._unspecified,
+                theme=root.get("theme") or self._unspecified,
+                story_structure=root.get("story_structure") or self._unspecified,
+                plan_json=json.dumps(cached_plan, ensure_ascii=False, indent=2)
+            )
+            
+            response = call_with_retry(
+                self.client.chat.completions.create,
+                model=self.model_config.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.model_config.temperature,
+                top_p=self.model_config.top_p,
+                max_tokens=self.model_config.max_tokens
+            )
+            plan = self._parse_plan_response(response.choices[0].message.content)
+        except Exception as e:
+            logger.warning(f"Plan cache lookup failed: {e}")
+            return False
+        
+        if plan is None or not plan["children"]:
+            logger.warning("Could not adapt cached plan, planning from scratch")
+            return False
+        
+        if not self._materialize_plan(plan, tree, max_depth, max_concurrency):
+            logger.warning("Adapted plan failed validation, planning from scratch")
+            return False
+        return True
+    
+    def _parse_plan_response(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """Parse a nested plan from an LLM response.
+        
+        Args:
+            response_text: Raw response from LLM
+            
+        Returns:
+            Plan dictionary with "content", "word_count" and "children" on
+            every node, or None if the response is not a valid plan
+        """
+        json_str = extract_json(response_text)
+        if json_str is None:
+            return None
+        
+        try:
+            plan = _json_loads(json_str)
+        except json.JSONDecodeError as e:
+            logger.warning(f"JSON decode error in plan: {e}")
+            return None
+        
+        return plan if self._is_valid_plan(plan) else None
+    
+    def _is_valid_plan(self, plan: Any) -> bool:
+        """Check that a parsed plan has the expected nested shape.
+        
+        Args:
+            plan: Parsed JSON value
+            
+        Returns:
+            True if every node has content, an integer word count and a
+            list of children
+        """
+        if not isinstance(plan, dict):
+            return False
+        if not isinstance(plan.get("word_count"), int) or not isinstance(plan.get("content"), str):
+            return False
+        
+        children = plan.setdefault("children", [])
+        return isinstance(children, list) and all(self._is_valid_plan(child) for child in children)
+    
+    def _materialize_plan(
+        self,
+        plan: Dict[str, Any],
+        tree: WritingTree,
+        max_depth: int,
+        max_concurrency: int
+    ) -> bool:
+        """Add the nodes of a nested plan below the root node.
+        
+        Every level of the plan is validated like a single decomposition,
+        so its children are rescaled to the parent's word count. Plan
+        leaves of more than twice max_word_count are decomposed again with
+        the node-by-node planner; the rest of the plan is used as is.
+        
+        Args:
+            plan: Nested plan whose root corresponds to the tree's root node
+            tree: Writing tree containing the root node
+            max_depth: Maximum allowed depth
+            max_concurrency: Maximum number of nodes planned concurrently
+            
+        Returns:
+            True if the plan was added, False if its top level was rejected
+            and the tree was left unchanged
+        """
+        oversized_limit = 2 * self.threshold_config.max_word_count
+        oversized = []
+        
+        root_words = tree.get_node("root").get("word_count", 0)
+        plan["children"] = self._validate_children(plan["children"], root_words)
+        if not plan["children"]:
+            return False
+        
+        stack = [("root", plan, 0)]
+        while stack:
+            node_name, node_plan, depth = stack.pop()
+            node_words = tree.get_node(node_name).get("word_count", 0)
+            children = node_plan["children"]
+            # The root level was validated above
+            if children and depth > 0:
+                children = self._validate_children(children, node_words)
+            
+            if children and depth < max_depth:
+                child_names = self._add_children(node_name, children, tree)
+                stack.extend(
+                    (child_name, child_plan, depth + 1)
+                    for child_name, child_plan in zip(child_names, children)
+                )
+            elif node_words > oversized_limit and depth < max_depth:
+                oversized.append((node_name, depth))
+            else:
+                tree.mark_as_leaf(node_name)
+        
+        if oversized:
+            logger.info(f"{len(oversized)} plan leaves exceed {oversized_limit} words, decomposing them again")
+            self._expand_nodes(oversized, tree, max_depth, max_concurrency)
+        
+        return True
+    
+    def _add_children(
+        self,
+        node_name: str,
+        children: List[Dict],
+        tree: WritingTree
+    ) -> List[str]:
+        """Add child nodes below a node.
+        
+        Writing parameters a child does not specify are inherited from the
+        parent node.
+        
+        Args:
+            node_name: Name of the parent node
+            children: Child node specifications
+            tree: Writing tree
+            
+        Returns:
+            Names of the added child nodes, in order
+        """
+        node = tree.get_node(node_name)
+        child_names = []
         
-        # Step 5: Add children to tree
         for i, child_spec in enumerate(children):
             child_name = f"{node_name}_child{i+1}"
             
@@ -441,8 +902,115 @@ class PlanningAgent:
             
             tree.add_edge(node_name, child_name)
             logger.debug(f"Added child '{child_name}' to '{node_name}'")
+            child_names.append(child_name)
         
-        # Step 6: Recursively process children
-        for i in range(len(children)):
-            child_name = f"{node_name}_child{i+1}"
-            self._process_node_recursive(child_name, tree, depth + 1, max_depth)
+        return child_names
+    
+    def _expand_nodes(
+        self,
+        frontier: List[Tuple[str, int]],
+        tree: WritingTree,
+        max_depth: int,
+        max_concurrency: int
+    ) -> None:
+        """Expand nodes and all their descendants, one tree level at a time.
+        
+        Every node in the frontier is expanded concurrently, then the
+        children they produced form the next frontier. Sibling subtrees are
+        independent, so planning takes about one round of LLM calls per tree
+        level instead of one per node.
+        
+        Args:
+            frontier: (node name, depth) pairs to start from
+            tree: Writing tree
+            max_depth: Maximum allowed depth
+            max_concurrency: Maximum number of nodes expanded concurrently
+        """
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            while frontier:
+                results = executor.map(
+                    lambda item: self._expand_one(item[0], tree, item[1], max_depth),
+                    frontier
+                )
+                frontier = [
+                    (child_name, depth + 1)
+                    for (_, depth), child_names in zip(frontier, results)
+                    for child_name in child_names
+                ]
+    
+    def _expand_one(
+        self,
+        node_name: str,
+        tree: WritingTree,
+        depth: int,
+        max_depth: int
+    ) -> List[str]:
+        """Decide whether to decompose one node and add its children.
+        
+        Args:
+            node_name: Name of node to process
+            tree: Writing tree
+            depth: Current depth in tree
+            max_depth: Maximum allowed depth
+            
+        Returns:
+            Names of the added child nodes, or an empty list if the node
+            was marked as a leaf
+        """
+        if depth >= max_depth:
+            logger.warning(f"Max depth {max_depth} reached, marking as leaf")
+            tree.mark_as_leaf(node_name)
+            return []
+        
+        node = tree.get_node(node_name)
+        
+        # Step 1: Threshold check
+        threshold_decision = self.threshold_decision(node)
+        tree.update_node_metadata(
+            node_name,
+            decompose_threshold_passed=threshold_decision != "skip",
+            decompose_threshold_decision=threshold_decision
+        )
+        
+        if threshold_decision == "skip":
+            logger.info(f"Node '{node_name}' marked as leaf (threshold check failed)")
+            tree.mark_as_leaf(node_name)
+            return []
+        
+        # Step 2: One agent call decides and returns the children; a node
+        # whose word count forces decomposition ignores the decision
+        try:
+            should_decompose, reasoning, children = self.decompose_node(node_name, tree, node=node)
+        except GenerationError as e:
+            logger.error(f"Decomposition failed for '{node_name}': {e}")
+            tree.mark_as_leaf(node_name)
+            return []
+        
+        if threshold_decision == "ask":
+            tree.update_node_metadata(
+                node_name,
+                decompose_agent_decision=should_decompose,
+                decompose_agent_reasoning=reasoning
+            )
+            if not should_decompose:
+                logger.info(f"Node '{node_name}' marked as leaf (agent decision)")
+                tree.mark_as_leaf(node_name)
+                return []
+        else:
+            logger.debug(f"Node '{node_name}' exceeds max_word_count, decomposing regardless of agent decision")
+            if not children:
+                # The agent declined or gave no children; ask once more,
+                # stating that decomposition is mandatory
+                logger.info(f"Node '{node_name}' must be decomposed, asking the agent again")
+                try:
+                    _, _, children = self.decompose_node(node_name, tree, node=node, force=True)
+                except GenerationError as e:
+                    logger.error(f"Forced decomposition failed for '{node_name}': {e}")
+        
+        if not children:
+            logger.info(f"Node '{node_name}' marked as leaf (no children generated)")
+            tree.mark_as_leaf(node_name)
+            return []
+        
+        # Step 3: Add children to tree
+        return self._add_children(node_name, children, tree)
@@ -1,8 +1,35 @@
 """Prompt templates for TreeWriter models."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Mapping
+import json
 import re
+import string
 
+try:
+    import orjson
+    
+    def _json_dumps(value: Any) -> str:
+        return orjson.dumps(value).decode("utf-8")
+except ImportError:  # orjson is optional
+    def _json_dumps(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+# Shown in prompts for optional node fields that were not given
+UNSPECIFIED_CN = "未指定"
+UNSPECIFIED_EN = "Not specified"
+
+# Optional node fields rendered as unspecified when unset
+NODE_PROMPT_FIELDS = (
+    "story_setting",
+    "writing_tone",
+    "language_style",
+    "theme",
+    "story_structure",
+    "plot_development",
+    "worldbuilding",
+    "writing_goals",
+)
 
 # Planning Agent Prompt Template (Chinese)
 PLANNING_PROMPT_CN = """## 角色介绍
@@ -118,6 +145,298 @@ Please output your decision in JSON format:
 If should_decompose is false, the children array should be empty.
 """
 
+# Planning Agent prompts split into a static system message and a per-node
+# user message; the system message is identical for every planning call
+PLANNING_SYSTEM_PROMPT_CN = """## 角色介绍
+你是一个专业的写作规划助手，能够将复杂的写作任务分解为可管理的子任务。你的目标是创建一个层次化的写作树结构。
+
+## 分解决策
+请判断用户给出的当前任务是否需要进一步分解为子任务。
+
+### 判断标准：
+1. **字数考虑**：如果任务字数超过 {max_word_count} 字，通常需要分解
+2. **复杂度考虑**：如果任务包含多个独立的情节线或主题，应该分解
+3. **结构考虑**：如果任务可以自然地分为几个连贯的部分，建议分解
+4. **完整性考虑**：如果任务已经足够具体和聚焦，可以不分解
+
+### 如果需要分解：
+- 将任务分解为 {min_children} 到 {max_children} 个子任务
+- 确保子任务的字数总和等于父任务字数
+- 每个子任务应该有明确的写作目标和内容要求
+- 子任务之间应该有逻辑连贯性
+
+## 输出格式
+请以 JSON 格式输出你的决策：
+
+```json
+{{
+  "should_decompose": true/false,
+  "reasoning": "你的判断理由",
+  "children": [
+    {{
+      "name": "子任务名称",
+      "content": "子任务的具体写作要求",
+      "word_count": 子任务字数,
+      "story_setting": "子任务的场景设定",
+      "character_list": ["人物1", "人物2"],
+      "writing_goals": "子任务的写作目标"
+    }}
+  ]
+}}
+```
+
+如果 should_decompose 为 false，children 数组应为空。
+"""
+
+PLANNING_USER_PROMPT_CN = """## 当前任务
+{content}
+
+## 任务要求
+- 目标字数：{word_count} 字
+- 故事背景：{story_setting}
+- 主要人物：{character_list}
+- 写作基调：{writing_tone}
+- 语言风格：{language_style}
+- 核心主题：{theme}
+- 故事结构：{story_structure}
+- 情节发展：{plot_development}
+- 世界观设定：{worldbuilding}
+- 写作目标：{writing_goals}
+"""
+
+PLANNING_SYSTEM_PROMPT_EN = """## Role Introduction
+You are a professional writing planning assistant capable of decomposing complex writing tasks into manageable subtasks. Your goal is to create a hierarchical writing tree structure.
+
+## Decomposition Decision
+Please determine whether the current task given by the user needs to be further decomposed into subtasks.
+
+### Criteria:
+1. **Word Count**: If the task exceeds {max_word_count} words, it usually needs decomposition
+2. **Complexity**: If the task contains multiple independent plot lines or themes, it should be decomposed
+3. **Structure**: If the task can naturally be divided into several coherent parts, decomposition is recommended
+4. **Completeness**: If the task is already specific and focused enough, it may not need decomposition
+
+### If Decomposition is Needed:
+- Decompose the task into {min_children} to {max_children} subtasks
+- Ensure the sum of subtask word counts equals the parent task word count
+- Each subtask should have clear writing goals and content requirements
+- Subtasks should have logical coherence
+
+## Output Format
+Please output your decision in JSON format:
+
+```json
+{{
+  "should_decompose": true/false,
+  "reasoning": "Your reasoning",
+  "children": [
+    {{
+      "name": "Subtask name",
+      "content": "Specific writing requirements for subtask",
+      "word_count": subtask_word_count,
+      "story_setting": "Subtask setting",
+      "character_list": ["Character1", "Character2"],
+      "writing_goals": "Subtask writing goals"
+    }}
+  ]
+}}
+```
+
+If should_decompose is false, the children array should be empty.
+"""
+
+PLANNING_USER_PROMPT_EN = """## Current Task
+{content}
+
+## Task Requirements
+- Target word count: {word_count} words
+- Story setting: {story_setting}
+- Main characters: {character_list}
+- Writing tone: {writing_tone}
+- Language style: {language_style}
+- Core theme: {theme}
+- Story structure: {story_structure}
+- Plot development: {plot_development}
+- Worldbuilding: {worldbuilding}
+- Writing goals: {writing_goals}
+"""
+
+# Follow-up sent when a node that must be decomposed came back without
+# children
+FORCED_DECOMPOSITION_PROMPT_CN = """该任务的目标字数为 {word_count} 字，超过了 {max_word_count} 字，必须进行分解。请将 should_decompose 设为 true，并将任务分解为 {min_children} 到 {max_children} 个子任务，按相同的 JSON 格式输出。
+"""
+
+FORCED_DECOMPOSITION_PROMPT_EN = """This task has a target of {word_count} words, which exceeds {max_word_count} words, so it must be decomposed. Set should_decompose to true and decompose the task into {min_children} to {max_children} subtasks, using the same JSON format.
+"""
+
+# One-shot Planning Prompt Template (Chinese)
+PLANNING_ONESHOT_PROMPT_CN = """## 角色介绍
+你是一个专业的写作规划助手，能够将复杂的写作任务分解为可管理的子任务。你的目标是一次性创建完整的层次化写作树结构。
+
+## 当前任务
+{content}
+
+## 任务要求
+- 目标字数：{word_count} 字
+- 故事背景：{story_setting}
+- 主要人物：{character_list}
+- 写作基调：{writing_tone}
+- 语言风格：{language_style}
+- 核心主题：{theme}
+- 故事结构：{story_structure}
+- 情节发展：{plot_development}
+- 世界观设定：{worldbuilding}
+- 写作目标：{writing_goals}
+
+## 规划要求
+- 逐层分解任务，直到每个叶节点的字数不超过 {max_word_count} 字
+- 每个需要分解的节点分为 {min_children} 到 {max_children} 个子节点
+- 每个节点的子节点字数总和等于该节点字数
+- 树的深度不超过 {max_depth} 层
+- 每个节点应该有明确的写作目标和内容要求，兄弟节点之间应该有逻辑连贯性
+
+## 输出格式
+请以 JSON 格式输出完整的写作树，叶节点的 children 为空数组：
+
+```json
+{{
+  "content": "任务的具体写作要求",
+  "word_count": 字数,
+  "children": [
+    {{
+      "content": "子任务的具体写作要求",
+      "word_count": 子任务字数,
+      "story_setting": "子任务的场景设定",
+      "character_list": ["人物1", "人物2"],
+      "writing_goals": "子任务的写作目标",
+      "children": []
+    }}
+  ]
+}}
+```
+"""
+
+# One-shot Planning Prompt Template (English)
+PLANNING_ONESHOT_PROMPT_EN = """## Role Introduction
+You are a professional writing planning assistant capable of decomposing complex writing tasks into manageable subtasks. Your goal is to create the complete hierarchical writing tree structure in one pass.
+
+## Current Task
+{content}
+
+## Task Requirements
+- Target word count: {word_count} words
+- Story setting: {story_setting}
+- Main characters: {character_list}
+- Writing tone: {writing_tone}
+- Language style: {language_style}
+- Core theme: {theme}
+- Story structure: {story_structure}
+- Plot development: {plot_development}
+- Worldbuilding: {worldbuilding}
+- Writing goals: {writing_goals}
+
+## Planning Requirements
+- Decompose the task level by level until no leaf exceeds {max_word_count} words
+- Split every node that needs decomposition into {min_children} to {max_children} children
+- The children's word counts must sum to their parent's word count
+- The tree must be at most {max_depth} levels deep
+- Each node should have clear writing goals and content requirements, and siblings should have logical coherence
+
+## Output Format
+Please output the complete writing tree in JSON format; leaves have an empty children array:
+
+```json
+{{
+  "content": "Specific writing requirements for the task",
+  "word_count": word_count,
+  "children": [
+    {{
+      "content": "Specific writing requirements for subtask",
+      "word_count": subtask_word_count,
+      "story_setting": "Subtask setting",
+      "character_list": ["Character1", "Character2"],
+      "writing_goals": "Subtask writing goals",
+      "children": []
+    }}
+  ]
+}}
+```
+"""
+
+# Plan Adaptation Prompt Template (Chinese)
+PLAN_ADAPT_PROMPT_CN = """## 角色介绍
+你是一个专业的写作规划助手。下面给出一个为相似写作任务制定的写作树规划，请将它调整为适合新任务的规划。
+
+## 新任务
+{content}
+
+## 任务要求
+- 目标字数：{word_count} 字
+- 故事背景：{story_setting}
+- 核心主题：{theme}
+- 故事结构：{story_structure}
+
+## 参考规划
+```json
+{plan_json}
+```
+
+## 调整要求
+- 保留参考规划的层次结构，按新任务改写每个节点的 content
+- 可以根据需要增删节点
+- 每个节点的子节点字数总和应等于该节点字数，根节点字数为 {word_count}
+
+## 输出格式
+请以与参考规划相同的 JSON 格式输出调整后的规划：
+
+```json
+{{
+  "content": "写作要求",
+  "word_count": 字数,
+  "children": [
+    {{"content": "子任务的具体写作要求", "word_count": 子任务字数, "children": []}}
+  ]
+}}
+```
+"""
+
+# Plan Adaptation Prompt Template (English)
+PLAN_ADAPT_PROMPT_EN = """## Role Introduction
+You are a professional writing planning assistant. Below is a writing tree plan made for a similar writing task. Please adapt it to the new task.
+
+## New Task
+{content}
+
+## Task Requirements
+- Target word count: {word_count} words
+- Story setting: {story_setting}
+- Core theme: {theme}
+- Story structure: {story_structure}
+
+## Reference Plan
+```json
+{plan_json}
+```
+
+## Adaptation Requirements
+- Keep the hierarchy of the reference plan and rewrite each node's content for the new task
+- Add or remove nodes where needed
+- The children's word counts must sum to their parent's word count; the root has {word_count} words
+
+## Output Format
+Please output the adapted plan in the same JSON format as the reference plan:
+
+```json
+{{
+  "content": "Writing requirements",
+  "word_count": word_count,
+  "children": [
+    {{"content": "Specific writing requirements for subtask", "word_count": subtask_word_count, "children": []}}
+  ]
+}}
+```
+"""
+
 # Thinking Model Prompt Template (Chinese)
 THINKING_PROMPT_CN = """## 角色介绍
 你是一个专业的写作大纲生成助手。你的任务是为给定的写作任务生成详细的写作大纲。
@@ -280,36 +599,367 @@ When writing, please note:
 Please output the complete text content directly, without any meta-information or explanations.
 """
 
+# Thinking and Writing prompts split into a system message with the story-wide
+# context, identical for every leaf of a tree, and a per-leaf user message
+THINKING_SYSTEM_PROMPT_CN = """## 角色介绍
+你是一个专业的写作大纲生成助手。你的任务是为用户给出的写作任务生成详细的写作大纲。
 
-def format_template(template: str, **kwargs) -> str:
-    """Format a template with variable substitution.
-    
-    Args:
-        template: Template string with {variable} placeholders
-        **kwargs: Variables to substitute
-        
-    Returns:
-        Formatted template string
-        
-    Raises:
-        ValueError: If required variables are missing
-    """
-    # Find all variables in template
-    variables = re.findall(r'\{(\w+)\}', template)
-    
-    # Check for missing variables
-    missing = [var for var in variables if var not in kwargs]
-    if missing:
-        raise ValueError(f"Missing required variables: {', '.join(missing)}")
-    
-    # Format template
-    try:
-        return template.format(**kwargs)
-    except KeyError as e:
-        raise ValueError(f"Missing variable: {e}")
-
+## 总体写作任务
+{root_content}
 
-def get_planning_prompt(language: str = "cn") -> str:
+## 整体设定
+- 故事背景：{story_setting}
+- 主要人物：{character_list}
+- 写作基调：{writing_tone}
+- 语言风格：{language_style}
+- 核心主题：{theme}
+- 故事结构：{story_structure}
+- 世界观设定：{worldbuilding}
+
+## 要求
+请生成一个详细的写作大纲，包括：
+1. 主要内容点（3-5个关键点）
+2. 每个内容点的展开方向
+3. 需要突出的细节和描写重点
+4. 与整体任务的衔接方式
+
+大纲应该：
+- 符合指定的字数要求
+- 体现指定的写作基调和语言风格
+- 包含所有相关的人物和场景
+- 服务于整体的写作目标
+
+## 输出格式
+请直接输出写作大纲，使用清晰的结构化格式（如编号列表或标题层次）。
+"""
+
+THINKING_USER_PROMPT_CN = """## 写作任务
+{content}
+
+## 任务要求
+- 目标字数：{word_count} 字
+- 故事背景：{story_setting}
+- 主要人物：{character_list}
+- 情节发展：{plot_development}
+- 写作目标：{writing_goals}
+
+## 上下文信息
+父节点任务：{parent_content}
+"""
+
+THINKING_SYSTEM_PROMPT_EN = """## Role Introduction
+You are a professional writing outline generator. Your task is to generate a detailed writing outline for the writing task given by the user.
+
+## Overall Writing Task
+{root_content}
+
+## Overall Settings
+- Story setting: {story_setting}
+- Main characters: {character_list}
+- Writing tone: {writing_tone}
+- Language style: {language_style}
+- Core theme: {theme}
+- Story structure: {story_structure}
+- Worldbuilding: {worldbuilding}
+
+## Requirements
+Please generate a detailed writing outline including:
+1. Main content points (3-5 key points)
+2. Development direction for each point
+3. Details and descriptive focuses to highlight
+4. How it connects to the overall task
+
+The outline should:
+- Match the specified word count
+- Reflect the specified writing tone and language style
+- Include all relevant characters and settings
+- Serve the overall writing goals
+
+## Output Format
+Please output the writing outline directly, using a clear structured format (such as numbered lists or heading hierarchy).
+"""
+
+THINKING_USER_PROMPT_EN = """## Writing Task
+{content}
+
+## Task Requirements
+- Target word count: {word_count} words
+- Story setting: {story_setting}
+- Main characters: {character_list}
+- Plot development: {plot_development}
+- Writing goals: {writing_goals}
+
+## Context Information
+Parent node task: {parent_content}
+"""
+
+WRITING_SYSTEM_PROMPT_CN = """## 角色介绍
+你是一个专业的创意写作助手。你的任务是根据用户提供的大纲和要求生成高质量的文本内容。
+
+## 总体写作任务
+{root_content}
+
+## 整体设定
+- 故事背景：{story_setting}
+- 主要人物：{character_list}
+- 写作基调：{writing_tone}
+- 语言风格：{language_style}
+- 核心主题：{theme}
+- 故事结构：{story_structure}
+- 世界观设定：{worldbuilding}
+
+## 要求
+请根据大纲和要求，生成完整的文本内容。
+
+写作时请注意：
+1. 严格遵循提供的大纲结构
+2. 字数应接近目标字数（允许±20%的偏差）
+3. 保持与前序内容的连贯性和一致性
+4. 充分体现指定的写作基调和语言风格
+5. 生动描写人物和场景
+6. 确保情节发展符合整体规划
+
+## 输出格式
+请直接输出完整的文本内容，不要包含任何元信息或说明。
+"""
+
+WRITING_USER_PROMPT_CN = """## 写作任务
+{content}
+
+## 写作大纲
+{outline}
+
+## 任务要求
+- 目标字数：{word_count} 字
+- 故事背景：{story_setting}
+- 主要人物：{character_list}
+- 情节发展：{plot_development}
+- 写作目标：{writing_goals}
+
+## 上下文信息
+已生成的前序内容：
+{previous_content}
+"""
+
+WRITING_SYSTEM_PROMPT_EN = """## Role Introduction
+You are a professional creative writing assistant. Your task is to generate high-quality text content based on the outline and requirements provided by the user.
+
+## Overall Writing Task
+{root_content}
+
+## Overall Settings
+- Story setting: {story_setting}
+- Main characters: {character_list}
+- Writing tone: {writing_tone}
+- Language style: {language_style}
+- Core theme: {theme}
+- Story structure: {story_structure}
+- Worldbuilding: {worldbuilding}
+
+## Requirements
+Please generate complete text content based on the outline and requirements.
+
+When writing, please note:
+1. Strictly follow the provided outline structure
+2. Word count should be close to the target (±20% deviation allowed)
+3. Maintain coherence and consistency with previous content
+4. Fully reflect the specified writing tone and language style
+5. Vividly describe characters and scenes
+6. Ensure plot development aligns with overall planning
+
+## Output Format
+Please output the complete text content directly, without any meta-information or explanations.
+"""
+
+WRITING_USER_PROMPT_EN = """## Writing Task
+{content}
+
+## Writing Outline
+{outline}
+
+## Task Requirements
+- Target word count: {word_count} words
+- Story setting: {story_setting}
+- Main characters: {character_list}
+- Plot development: {plot_development}
+- Writing goals: {writing_goals}
+
+## Context Information
+Previously generated content:
+{previous_content}
+"""
+
+# Fused Outline + Writing user prompts for small leaves; they follow the
+# same system message as the writing model's separate text calls
+FUSED_WRITING_USER_PROMPT_CN = """## 写作任务
+{content}
+
+## 任务要求
+- 目标字数：{word_count} 字
+- 故事背景：{story_setting}
+- 主要人物：{character_list}
+- 情节发展：{plot_development}
+- 写作目标：{writing_goals}
+
+## 要求
+本任务没有提供大纲：
+1. 先构思一个简要的写作大纲（3-5个关键点）
+2. 再严格按照大纲写出完整的文本内容
+
+## 输出格式
+本次请不要直接输出正文，而是以 JSON 格式输出，不要包含任何其他内容：
+
+```json
+{{
+  "outline": "写作大纲",
+  "text": "完整的文本内容"
+}}
+```
+"""
+
+FUSED_WRITING_USER_PROMPT_EN = """## Writing Task
+{content}
+
+## Task Requirements
+- Target word count: {word_count} words
+- Story setting: {story_setting}
+- Main characters: {character_list}
+- Plot development: {plot_development}
+- Writing goals: {writing_goals}
+
+## Requirements
+No outline is provided for this task:
+1. First plan a brief writing outline (3-5 key points)
+2. Then write the complete text, strictly following the outline
+
+## Output Format
+Instead of outputting the text directly, please output in JSON format, without anything else:
+
+```json
+{{
+  "outline": "writing outline",
+  "text": "complete text content"
+}}
+```
+"""
+
+
+def node_prompt_vars(node: Mapping[str, Any], unspecified: str = UNSPECIFIED_CN) -> Dict[str, Any]:
+    """Collect the prompt variables describing a node.
+    
+    Optional fields that are missing or None render as the unspecified
+    placeholder instead of "None". The character list is rendered as JSON,
+    matching the format the planning prompt asks for.
+    
+    Args:
+        node: Node metadata dictionary
+        unspecified: Placeholder for unset fields, in the prompt's language
+            (see get_unspecified)
+        
+    Returns:
+        Variables for content, word_count, character_list and every field
+        in NODE_PROMPT_FIELDS
+    """
+    prompt_vars = dict.fromkeys(NODE_PROMPT_FIELDS, unspecified)
+    prompt_vars["character_list"] = "[]"
+    prompt_vars["content"] = node.get("content", "")
+    prompt_vars["word_count"] = node.get("word_count", 0)
+    
+    for field in NODE_PROMPT_FIELDS:
+        value = node.get(field)
+        if value is not None:
+            prompt_vars[field] = value
+    
+    character_list = node.get("character_list")
+    if character_list is not None:
+        prompt_vars["character_list"] = _json_dumps(character_list)
+    
+    return prompt_vars
+
+
+def format_template(template: str, **kwargs) -> str:
+    """Format a template with variable substitution.
+    
+    Args:
+        template: Template string with {variable} placeholders
+        **kwargs: Variables to substitute
+        
+    Returns:
+        Formatted template string
+        
+    Raises:
+        ValueError: If required variables are missing
+    """
+    # Find all variables in template
+    variables = re.findall(r'\{(\w+)\}', template)
+    
+    # Check for missing variables
+    missing = [var for var in variables if var not in kwargs]
+    if missing:
+        raise ValueError(f"Missing required variables: {', '.join(missing)}")
+    
+    # Format template
+    try:
+        return template.format(**kwargs)
+    except KeyError as e:
+        raise ValueError(f"Missing variable: {e}")
+
+
+def compile_template(template: str) -> Callable[[Mapping[str, Any]], str]:
+    """Prepare a template for repeated formatting.
+    
+    The template's placeholders are parsed once; the returned function only
+    checks for missing variables and calls str.format_map, instead of
+    scanning the template on every call like format_template.
+    
+    Args:
+        template: Template string with {variable} placeholders
+        
+    Returns:
+        Function formatting the template with a mapping of variables
+        
+    Raises:
+        ValueError: If the template is malformed; the returned function
+            raises ValueError if required variables are missing
+    """
+    try:
+        variables = frozenset(
+            re.match(r"[^.\[]*", field_name).group()
+            for _, field_name, _, _ in string.Formatter().parse(template)
+            if field_name
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid template: {e}")
+    
+    format_map = template.format_map
+    
+    def render(values: Mapping[str, Any]) -> str:
+        missing = variables.difference(values)
+        if missing:
+            raise ValueError(f"Missing required variables: {', '.join(sorted(missing))}")
+        return format_map(values)
+    
+    return render
+
+
+def get_unspecified(language: str = "cn") -> str:
+    """Get the placeholder shown for unset node fields.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Placeholder text in the given language
+    """
+    if language == "cn":
+        return UNSPECIFIED_CN
+    elif language == "en":
+        return UNSPECIFIED_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_planning_prompt(language: str = "cn") -> str:
     """Get planning agent prompt template.
     
     Args:
@@ -358,3 +1008,173 @@ def get_writing_prompt(language: str = "cn") -> str:
         return WRITING_PROMPT_EN
     else:
         raise ValueError(f"Unsupported language: {language}")
+
+
+def get_thinking_system_prompt(language: str = "cn") -> str:
+    """Get thinking model system prompt template.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Thinking model system prompt template
+    """
+    if language == "cn":
+        return THINKING_SYSTEM_PROMPT_CN
+    elif language == "en":
+        return THINKING_SYSTEM_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_thinking_user_prompt(language: str = "cn") -> str:
+    """Get thinking model user prompt template.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Thinking model user prompt template
+    """
+    if language == "cn":
+        return THINKING_USER_PROMPT_CN
+    elif language == "en":
+        return THINKING_USER_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_writing_system_prompt(language: str = "cn") -> str:
+    """Get writing model system prompt template.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Writing model system prompt template
+    """
+    if language == "cn":
+        return WRITING_SYSTEM_PROMPT_CN
+    elif language == "en":
+        return WRITING_SYSTEM_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_writing_user_prompt(language: str = "cn") -> str:
+    """Get writing model user prompt template.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Writing model user prompt template
+    """
+    if language == "cn":
+        return WRITING_USER_PROMPT_CN
+    elif language == "en":
+        return WRITING_USER_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_planning_system_prompt(language: str = "cn") -> str:
+    """Get the static system part of the planning agent prompt.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Planning system prompt template
+    """
+    if language == "cn":
+        return PLANNING_SYSTEM_PROMPT_CN
+    elif language == "en":
+        return PLANNING_SYSTEM_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_planning_user_prompt(language: str = "cn") -> str:
+    """Get the per-node user part of the planning agent prompt.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Planning user prompt template
+    """
+    if language == "cn":
+        return PLANNING_USER_PROMPT_CN
+    elif language == "en":
+        return PLANNING_USER_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_forced_decomposition_prompt(language: str = "cn") -> str:
+    """Get the follow-up prompt for nodes that must be decomposed.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Forced decomposition prompt template
+    """
+    if language == "cn":
+        return FORCED_DECOMPOSITION_PROMPT_CN
+    elif language == "en":
+        return FORCED_DECOMPOSITION_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_planning_oneshot_prompt(language: str = "cn") -> str:
+    """Get one-shot planning prompt template.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        One-shot planning prompt template
+    """
+    if language == "cn":
+        return PLANNING_ONESHOT_PROMPT_CN
+    elif language == "en":
+        return PLANNING_ONESHOT_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_plan_adapt_prompt(language: str = "cn") -> str:
+    """Get plan adaptation prompt template.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Plan adaptation prompt template
+    """
+    if language == "cn":
+        return PLAN_ADAPT_PROMPT_CN
+    elif language == "en":
+        return PLAN_ADAPT_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
+def get_fused_writing_user_prompt(language: str = "cn") -> str:
+    """Get the user prompt for fused outline and text generation.
+    
+    Args:
+        language: Language code ("cn" or "en")
+        
+    Returns:
+        Fused writing user prompt template
+    """
+    if language == "cn":
+        return FUSED_WRITING_USER_PROMPT_CN
+    elif language == "en":
+        return FUSED_WRITING_USER_PROMPT_EN
+    else:
+        raise ValueError(f"Unsupported language: {language}")
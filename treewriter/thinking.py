@@ -1,11 +1,19 @@
 """Thinking model for generating writing outlines."""
 
-from typing import Dict, Optional
-from openai import OpenAI
+from typing import Any, Dict, Optional
+from openai import AsyncOpenAI, DefaultHttpxClient
 
 from .config import ModelConfig
 from .tree import WritingTree
-from .prompts import get_thinking_prompt, format_template
+from .llm import acall_with_retry, call_with_retry, get_client
+from .prompts import (
+    get_thinking_prompt,
+    get_thinking_system_prompt,
+    get_thinking_user_prompt,
+    get_unspecified,
+    format_template,
+    node_prompt_vars,
+)
 from .utils import setup_logger, GenerationError, ConfigurationError
 
 
@@ -28,7 +36,8 @@ class ThinkingModel:
         self,
         model_config: ModelConfig,
         prompt_template: Optional[str] = None,
-        language: str = "cn"
+        language: str = "cn",
+        http_client: Optional[DefaultHttpxClient] = None
     ):
         """Initialize thinking model.
         
@@ -36,6 +45,7 @@ class ThinkingModel:
             model_config: Model configuration
             prompt_template: Custom prompt template (optional)
             language: Language for prompts ("cn" or "en")
+            http_client: Shared HTTP client for API requests (optional)
             
         Raises:
             ConfigurationError: If configuration is invalid
@@ -47,22 +57,70 @@ class ThinkingModel:
         
         self.model_config = model_config
         self.language = language
+        self._unspecified = get_unspecified(language)
         
         if prompt_template:
+            # A custom template is sent as a single user message
             self.prompt_template = prompt_template
+            self._system_template = None
+            self._user_template = prompt_template
         else:
             self.prompt_template = get_thinking_prompt(language)
+            # The story-wide context goes into a system message that is
+            # identical for every leaf, so providers can cache the prefix
+            self._system_template = get_thinking_system_prompt(language)
+            self._user_template = get_thinking_user_prompt(language)
         
         if model_config.model_type == "api":
-            self.client = OpenAI(
-                api_key=model_config.api_key,
-                base_url=model_config.api_endpoint
-            )
+            self.client = get_client(model_config, http_client)
         else:
             raise NotImplementedError("Local model support not yet implemented")
         
         logger.info(f"ThinkingModel initialized with {model_config.model_type} model")
     
+    def build_request(
+        self,
+        node: Dict,
+        tree: WritingTree
+    ) -> Dict[str, Any]:
+        """Build the chat completion request for a leaf node's outline.
+        
+        Args:
+            node: Leaf node metadata
+            tree: Complete writing tree for context
+            
+        Returns:
+            Keyword arguments for client.chat.completions.create
+        """
+        # Get context from tree
+        root_node = tree.get_node("root")
+        root_content = root_node.get("content", "")
+        
+        # Get parent content if exists
+        parent_content = ""
+        # Simple approach: just use root for now
+        parent_content = root_content
+        
+        # Prepare prompt variables
+        prompt_vars = node_prompt_vars(node, self._unspecified)
+        prompt_vars["root_content"] = root_content
+        prompt_vars["parent_content"] = parent_content
+        
+        messages = []
+        if self._system_template is not None:
+            story_vars = node_prompt_vars(root_node, self._unspecified)
+            story_vars["root_content"] = root_content
+            messages.append({"role": "system", "content": format_template(self._system_template, **story_vars)})
+        messages.append({"role": "user", "content": format_template(self._user_template, **prompt_vars)})
+        
+        return {
+            "model": self.model_config.model_name,
+            "messages": messages,
+            "temperature": self.model_config.temperature,
+            "top_p": self.model_config.top_p,
+            "max_tokens": self.model_config.max_tokens,
+        }
+    
     def generate_outline(
         self,
         node: Dict,
@@ -81,54 +139,70 @@ class ThinkingModel:
             GenerationError: If outline generation fails
         """
         try:
-            # Get context from tree
-            root_node = tree.get_node("root")
-            root_content = root_node.get("content", "")
-            
-            # Get parent content if exists
-            parent_content = ""
-            # Simple approach: just use root for now
-            parent_content = root_content
-            
-            # Prepare prompt variables
-            prompt_vars = {
-                "content": node.get("content", ""),
-                "word_count": node.get("word_count", 0),
-                "story_setting": node.get("story_setting", "未指定"),
-                "character_list": str(node.get("character_list", [])),
-                "writing_tone": node.get("writing_tone", "未指定"),
-                "language_style": node.get("language_style", "未指定"),
-                "theme": node.get("theme", "未指定"),
-                "story_structure": node.get("story_structure", "未指定"),
-                "plot_development": node.get("plot_development", "未指定"),
-                "worldbuilding": node.get("worldbuilding", "未指定"),
-                "writing_goals": node.get("writing_goals", "未指定"),
-                "root_content": root_content,
-                "parent_content": parent_content,
-            }
+            response = call_with_retry(
+                self.client.chat.completions.create,
+                **self.build_request(node, tree)
+            )
+            return self._read_outline(response)
+        except Exception as e:
+            raise self._generation_error("outline", node, e)
+    
+    async def agenerate_outline(
+        self,
+        node: Dict,
+        tree: WritingTree,
+        client: AsyncOpenAI
+    ) -> str:
+        """Generate writing outline for a leaf node without blocking.
+        
+        Args:
+            node: Leaf node metadata
+            tree: Complete writing tree for context
+            client: Async OpenAI client to send the request with
             
-            # Format prompt
-            prompt = format_template(self.prompt_template, **prompt_vars)
+        Returns:
+            Structured outline as string
             
-            # Call LLM
-            response = self.client.chat.completions.create(
-                model=self.model_config.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.model_config.temperature,
-                top_p=self.model_config.top_p,
-                max_tokens=self.model_config.max_tokens
+        Raises:
+            GenerationError: If outline generation fails
+        """
+        try:
+            response = await acall_with_retry(
+                client.chat.completions.create,
+                **self.build_request(node, tree)
             )
+            return self._read_outline(response)
+        except Exception as e:
+            raise self._generation_error("outline", node, e)
+    
+    def _read_outline(self, response: Any) -> str:
+        """Get the outline from a chat completion response.
+        
+        Args:
+            response: Chat completion for a build_request request
             
-            outline = response.choices[0].message.content
-            logger.info(f"Generated outline ({len(outline)} chars)")
-            logger.debug(f"Outline preview: {outline[:200]}...")
-            
-            return outline
+        Returns:
+            Structured outline as string
+        """
+        outline = response.choices[0].message.content
+        logger.info(f"Generated outline ({len(outline)} chars)")
+        logger.debug(f"Outline preview: {outline[:200]}...")
+        return outline
+    
+    def _generation_error(self, what: str, node: Dict, error: Exception) -> GenerationError:
+        """Log a failed generation call and wrap its error.
+        
+        Args:
+            what: What was being generated, e.g. "outline"
+            node: Leaf node metadata
+            error: Error raised by the call or while reading its response
             
-        except Exception as e:
-            logger.error(f"Outline generation failed: {e}")
-            raise GenerationError(
-                f"Failed to generate outline: {e}",
-                node_name=node.get("content", "unknown"),
-                context={"node": node}
-            )
+        Returns:
+            GenerationError to raise
+        """
+        logger.error(f"Failed to generate {what}: {error}")
+        return GenerationError(
+            f"Failed to generate {what}: {error}",
+            node_name=node.get("content", "unknown"),
+            context={"node": node}
+        )
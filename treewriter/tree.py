@@ -1,7 +1,9 @@
 """Writing tree data structure for hierarchical text generation."""
 
-from collections import defaultdict
-from typing import Dict, List, Iterator, Optional
+import sys
+import threading
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Iterator, Optional, Tuple
 from .config import NodeMetadata
 from .utils import TreeStructureError
 
@@ -14,14 +16,20 @@ class WritingTree:
     associated metadata like word count, story setting, characters, etc.
     
     Attributes:
-        nodes: Dictionary mapping node names to their metadata
+        nodes: Dictionary mapping node names to their metadata dictionaries
         adjacency_list: Dictionary mapping parent nodes to lists of child node names
+        parent_map: Dictionary mapping child nodes to their parent node name
     """
     
     def __init__(self):
         """Initialize an empty writing tree."""
-        self.nodes: Dict[str, NodeMetadata] = {}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
         self.adjacency_list: Dict[str, List[str]] = defaultdict(list)
+        self.parent_map: Dict[str, str] = {}
+        self._dfs_cache: Dict[str, List[str]] = {}
+        # Guards nodes and edges added or updated from planning and
+        # generation worker threads
+        self._lock = threading.RLock()
     
     def add_root_node(
         self,
@@ -57,8 +65,7 @@ class WritingTree:
         Raises:
             TreeStructureError: If root node already exists
         """
-        if node_name in self.nodes:
-            raise TreeStructureError(f"Node '{node_name}' already exists")
+        node_name = sys.intern(node_name)
         
         metadata = NodeMetadata(
             content=content,
@@ -75,8 +82,13 @@ class WritingTree:
             writing_goals=writing_goals
         )
         
-        self.nodes[node_name] = metadata
-        self.adjacency_list[node_name] = []
+        with self._lock:
+            if node_name in self.nodes:
+                raise TreeStructureError(f"Node '{node_name}' already exists")
+            
+            # NodeMetadata defines the field set; nodes are stored as plain dicts
+            self.nodes[node_name] = metadata.to_dict()
+            self.adjacency_list[node_name] = []
     
     def add_node(
         self,
@@ -114,8 +126,9 @@ class WritingTree:
         Raises:
             TreeStructureError: If node name already exists
         """
-        if node_name in self.nodes:
-            raise TreeStructureError(f"Node '{node_name}' already exists")
+        # Interned names let dict lookups across nodes, adjacency_list and
+        # parent_map succeed on identity instead of comparing characters
+        node_name = sys.intern(node_name)
         
         metadata = NodeMetadata(
             content=content,
@@ -132,8 +145,13 @@ class WritingTree:
             writing_goals=writing_goals
         )
         
-        self.nodes[node_name] = metadata
-        self.adjacency_list[node_name] = []
+        with self._lock:
+            if node_name in self.nodes:
+                raise TreeStructureError(f"Node '{node_name}' already exists")
+            
+            # NodeMetadata defines the field set; nodes are stored as plain dicts
+            self.nodes[node_name] = metadata.to_dict()
+            self.adjacency_list[node_name] = []
     
     def add_edge(self, parent: str, child: str) -> None:
         """Add a parent-child relationship.
@@ -150,8 +168,17 @@ class WritingTree:
         if child not in self.nodes:
             raise TreeStructureError(f"Child node '{child}' does not exist")
         
-        if child not in self.adjacency_list[parent]:
-            self.adjacency_list[parent].append(child)
+        parent = sys.intern(parent)
+        child = sys.intern(child)
+        
+        with self._lock:
+            children = self.adjacency_list[parent]
+            if child not in children:
+                children.append(child)
+                # Only edges change traversal order, so this is the only invalidation
+                self._dfs_cache.clear()
+                # A node keeps the parent it was first attached to
+                self.parent_map.setdefault(child, parent)
     
     def get_node(self, node_name: str) -> Dict:
         """Retrieve node metadata as dictionary.
@@ -160,7 +187,7 @@ class WritingTree:
             node_name: Name of node to retrieve
             
         Returns:
-            Dictionary containing node metadata
+            Shallow copy of the dictionary containing node metadata
             
         Raises:
             TreeStructureError: If node doesn't exist
@@ -168,16 +195,16 @@ class WritingTree:
         if node_name not in self.nodes:
             raise TreeStructureError(f"Node '{node_name}' does not exist")
         
-        return self.nodes[node_name].to_dict()
+        return self.nodes[node_name].copy()
     
-    def get_children(self, node_name: str) -> List[str]:
+    def get_children(self, node_name: str) -> Tuple[str, ...]:
         """Get all children of a node.
         
         Args:
             node_name: Name of parent node
             
         Returns:
-            List of child node names
+            Tuple of child node names, in insertion order
             
         Raises:
             TreeStructureError: If node doesn't exist
@@ -185,7 +212,7 @@ class WritingTree:
         if node_name not in self.nodes:
             raise TreeStructureError(f"Node '{node_name}' does not exist")
         
-        return self.adjacency_list[node_name].copy()
+        return tuple(self.adjacency_list[node_name])
     
     def get_leaf_nodes(self) -> List[str]:
         """Get all leaf nodes in the tree.
@@ -193,15 +220,35 @@ class WritingTree:
         Returns:
             List of leaf node names
         """
-        leaf_nodes = []
-        for node_name, metadata in self.nodes.items():
-            if metadata.node_type == "leaf" or len(self.adjacency_list[node_name]) == 0:
-                leaf_nodes.append(node_name)
-        return leaf_nodes
+        adjacency_list = self.adjacency_list
+        return [
+            node_name
+            for node_name, metadata in self.nodes.items()
+            if not adjacency_list[node_name] or metadata["node_type"] == "leaf"
+        ]
+    
+    def iter_ready_leaves(self) -> Iterator[str]:
+        """Iterate over leaf nodes that are ready for text generation.
+        
+        A leaf is ready once it has an outline and no generated text yet.
+        Ready leaves are independent of each other, so they can be written
+        concurrently.
+        
+        Yields:
+            Names of leaf nodes with an outline but no generated text
+        """
+        nodes = self.nodes
+        for node_name in self.get_leaf_nodes():
+            metadata = nodes[node_name]
+            if metadata["outline"] and not metadata["generated_text"]:
+                yield node_name
     
     def traverse_dfs(self, start_node: str = "root") -> Iterator[str]:
         """Traverse tree in depth-first order.
         
+        The traversal order is cached per start node and reused until an
+        edge is added to the tree.
+        
         Args:
             start_node: Node to start traversal from (default: "root")
             
@@ -214,7 +261,48 @@ class WritingTree:
         if start_node not in self.nodes:
             raise TreeStructureError(f"Start node '{start_node}' does not exist")
         
+        order = self._dfs_cache.get(start_node)
+        if order is None:
+            order = self._dfs_order(start_node)
+            self._dfs_cache[start_node] = order
+        
+        yield from order
+    
+    def traverse_dfs_leaves_only(self, start_node: str = "root") -> Iterator[str]:
+        """Traverse leaf nodes in depth-first order.
+        
+        Leaves are the same nodes get_leaf_nodes() returns, but in reading
+        order rather than insertion order.
+        
+        Args:
+            start_node: Node to start traversal from (default: "root")
+            
+        Yields:
+            Leaf node names in depth-first order
+            
+        Raises:
+            TreeStructureError: If start node doesn't exist
+        """
+        adjacency_list = self.adjacency_list
+        nodes = self.nodes
+        for node_name in self.traverse_dfs(start_node):
+            if not adjacency_list[node_name] or nodes[node_name]["node_type"] == "leaf":
+                yield node_name
+    
+    def _dfs_order(self, start_node: str) -> List[str]:
+        """Compute depth-first order of the subtree rooted at a node.
+        
+        Args:
+            start_node: Node to start traversal from
+            
+        Returns:
+            Node names in depth-first order
+        """
+        # Iterative DFS with a list used as a LIFO stack: list.pop() is O(1)
+        # and avoids per-node generator frames of a recursive implementation
+        adjacency_list = self.adjacency_list
         visited = set()
+        order = []
         stack = [start_node]
         
         while stack:
@@ -223,13 +311,42 @@ class WritingTree:
                 continue
             
             visited.add(node)
-            yield node
+            order.append(node)
             
             # Add children in reverse order so they're processed in correct order
-            children = self.adjacency_list[node]
-            for child in reversed(children):
+            stack.extend(reversed(adjacency_list[node]))
+        
+        return order
+    
+    def traverse_bfs(self, start_node: str = "root") -> Iterator[str]:
+        """Traverse tree in breadth-first (level) order.
+        
+        Args:
+            start_node: Node to start traversal from (default: "root")
+            
+        Yields:
+            Node names in breadth-first order
+            
+        Raises:
+            TreeStructureError: If start node doesn't exist
+        """
+        if start_node not in self.nodes:
+            raise TreeStructureError(f"Start node '{start_node}' does not exist")
+        
+        # A deque gives O(1) removal from the head of the queue; list.pop(0)
+        # would shift every remaining element on each step
+        adjacency_list = self.adjacency_list
+        visited = {start_node}
+        queue = deque([start_node])
+        
+        while queue:
+            node = queue.popleft()
+            yield node
+            
+            for child in adjacency_list[node]:
                 if child not in visited:
-                    stack.append(child)
+                    visited.add(child)
+                    queue.append(child)
     
     def update_node_metadata(self, node_name: str, **kwargs) -> None:
         """Update node metadata fields.
@@ -245,9 +362,10 @@ class WritingTree:
             raise TreeStructureError(f"Node '{node_name}' does not exist")
         
         metadata = self.nodes[node_name]
-        for key, value in kwargs.items():
-            if hasattr(metadata, key):
-                setattr(metadata, key, value)
+        with self._lock:
+            for key, value in kwargs.items():
+                if key in metadata:
+                    metadata[key] = value
     
     def mark_as_leaf(self, node_name: str) -> None:
         """Mark a node as a leaf node.
@@ -261,7 +379,8 @@ class WritingTree:
         if node_name not in self.nodes:
             raise TreeStructureError(f"Node '{node_name}' does not exist")
         
-        self.nodes[node_name].node_type = "leaf"
+        with self._lock:
+            self.nodes[node_name]["node_type"] = "leaf"
     
     def get_parent(self, node_name: str) -> Optional[str]:
         """Get the parent of a node.
@@ -278,11 +397,52 @@ class WritingTree:
         if node_name not in self.nodes:
             raise TreeStructureError(f"Node '{node_name}' does not exist")
         
-        for parent, children in self.adjacency_list.items():
-            if node_name in children:
-                return parent
+        return self.parent_map.get(node_name)  # None if node is root
+    
+    def to_plan(self, node_name: str = "root") -> Dict[str, Any]:
+        """Serialize the shape of a subtree as nested dictionaries.
+
+        Only content, word count and the children structure are kept;
+        outlines, generated text and other metadata are left out.
+
+        Args:
+            node_name: Root of the subtree to serialize (default: "root")
+
+        Returns:
+            Dictionary with "content", "word_count" and "children" keys,
+            where "children" is a list of dictionaries of the same form
+
+        Raises:
+            TreeStructureError: If node doesn't exist
+        """
+        if node_name not in self.nodes:
+            raise TreeStructureError(f"Node '{node_name}' does not exist")
+        
+        metadata = self.nodes[node_name]
+        return {
+            "content": metadata["content"],
+            "word_count": metadata["word_count"],
+            "children": [self.to_plan(child) for child in self.adjacency_list[node_name]],
+        }
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """Get picklable state, leaving out the lock.
+        
+        Returns:
+            Instance state without the lock
+        """
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore state from pickling or copying with a fresh lock.
         
-        return None  # Node is root
+        Args:
+            state: Instance state from __getstate__
+        """
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
     
     def __len__(self) -> int:
         """Get number of nodes in tree.
@@ -1,7 +1,17 @@
 """Utility functions for TreeWriter."""
 
 import logging
-from typing import Dict, Any
+import re
+from typing import Dict, Any, List, Optional
+
+
+# A CJK ideograph counts as one word; any other run of non-space characters
+# counts as one word, matching str.split() for space-delimited languages
+_CJK_RANGES = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_WORD_PATTERN = re.compile(f"[{_CJK_RANGES}]|[^\\s{_CJK_RANGES}]+")
+
+# Characters that change the brace-matching state in extract_json
+_JSON_STRUCTURE = re.compile(r'[{}"\\]')
 
 
 def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
@@ -32,13 +42,93 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
 def count_words(text: str) -> int:
     """Count words in text.
     
+    Chinese characters are counted individually (字数), other text by
+    whitespace-separated tokens. Matches are counted while scanning, without
+    building a list of tokens.
+    
     Args:
         text: Text to count words in
         
     Returns:
         Number of words
     """
-    return len(text.split())
+    return sum(1 for _ in _WORD_PATTERN.finditer(text))
+
+
+def allocate_word_counts(weights: List[float], total: float) -> List[int]:
+    """Scale word counts so they sum exactly to a total.
+    
+    Uses largest-remainder (Hamilton) allocation: each share is rounded
+    down, and the words lost to rounding go to the shares with the largest
+    fractional parts. Integer arithmetic keeps the result exact.
+    
+    Args:
+        weights: Proposed word counts (non-negative, positive sum); floats
+            are rounded to whole words first
+        total: Word count the result must add up to
+        
+    Returns:
+        Word counts proportional to weights that sum to total
+        
+    Raises:
+        TypeError: If a weight or the total is not a number
+    """
+    weights = [int(round(weight)) for weight in weights]
+    total = int(round(total))
+    weight_sum = sum(weights)
+    shares = [divmod(weight * total, weight_sum) for weight in weights]
+    counts = [share for share, _ in shares]
+    
+    leftover = total - sum(counts)
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i][1], reverse=True)
+    for i in by_remainder[:leftover]:
+        counts[i] += 1
+    
+    return counts
+
+
+def extract_json(text: str) -> Optional[str]:
+    """Extract the first complete JSON object from model output.
+    
+    The object starts at the first "{" after a ```json fence, or at the
+    first "{" in the text if there is no fence. The text is scanned once,
+    tracking brace depth outside string literals, so nested objects and
+    braces inside strings are handled without regex backtracking.
+    
+    Args:
+        text: Raw response from LLM
+        
+    Returns:
+        JSON object source text, or None if there is no complete object
+    """
+    fence = text.find("```json")
+    start = text.find("{", fence + len("```json") if fence != -1 else 0)
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped_pos = -1
+    for match in _JSON_STRUCTURE.finditer(text, start):
+        pos = match.start()
+        if pos == escaped_pos:
+            continue
+        
+        char = match.group()
+        if char == "\\":
+            escaped_pos = pos + 1
+        elif char == '"':
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    
+    return None
 
 
 class TreeWriterError(Exception):
@@ -67,6 +157,11 @@ class GenerationError(TreeWriterError):
         super().__init__(message)
 
 
+class BatchError(TreeWriterError):
+    """Raised when a batch job does not complete successfully."""
+    pass
+
+
 class TreeStructureError(TreeWriterError):
     """Raised for tree structure violations."""
     pass
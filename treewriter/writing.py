@@ -1,12 +1,27 @@
 """Writing model for generating text content."""
 
-from typing import Dict, Optional
-from openai import OpenAI
+import json
+from typing import Any, Dict, Optional, Tuple
+from openai import AsyncOpenAI, DefaultHttpxClient
 
 from .config import ModelConfig
 from .tree import WritingTree
-from .prompts import get_writing_prompt, format_template
-from .utils import setup_logger, GenerationError, ConfigurationError, count_words
+from .llm import acall_with_retry, call_with_retry, get_client
+from .prompts import (
+    get_writing_prompt,
+    get_writing_system_prompt,
+    get_writing_user_prompt,
+    get_fused_writing_user_prompt,
+    get_unspecified,
+    format_template,
+    node_prompt_vars,
+)
+from .utils import setup_logger, extract_json, GenerationError, ConfigurationError, count_words
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional
+    _json_loads = json.loads
 
 
 logger = setup_logger(__name__)
@@ -21,6 +36,8 @@ class WritingModel:
     Attributes:
         model_config: Configuration for the LLM model
         prompt_template: Prompt template for text generation
+        fused_template: User prompt template producing outline and text in
+            one call, or None if a custom prompt template disables fusion
         client: OpenAI client (for API models)
     """
     
@@ -28,7 +45,8 @@ class WritingModel:
         self,
         model_config: ModelConfig,
         prompt_template: Optional[str] = None,
-        language: str = "cn"
+        language: str = "cn",
+        http_client: Optional[DefaultHttpxClient] = None
     ):
         """Initialize writing model.
         
@@ -36,6 +54,7 @@ class WritingModel:
             model_config: Model configuration
             prompt_template: Custom prompt template (optional)
             language: Language for prompts ("cn" or "en")
+            http_client: Shared HTTP client for API requests (optional)
             
         Raises:
             ConfigurationError: If configuration is invalid
@@ -47,22 +66,86 @@ class WritingModel:
         
         self.model_config = model_config
         self.language = language
+        self._unspecified = get_unspecified(language)
         
         if prompt_template:
+            # A custom template is sent as a single user message
             self.prompt_template = prompt_template
+            self._system_template = None
+            self._user_template = prompt_template
+            # The fused prompt would bypass the custom template
+            self.fused_template = None
         else:
             self.prompt_template = get_writing_prompt(language)
+            # The story-wide context goes into a system message that is
+            # identical for every leaf, so providers can cache the prefix
+            self._system_template = get_writing_system_prompt(language)
+            self._user_template = get_writing_user_prompt(language)
+            self.fused_template = get_fused_writing_user_prompt(language)
         
         if model_config.model_type == "api":
-            self.client = OpenAI(
-                api_key=model_config.api_key,
-                base_url=model_config.api_endpoint
-            )
+            self.client = get_client(model_config, http_client)
         else:
             raise NotImplementedError("Local model support not yet implemented")
         
         logger.info(f"WritingModel initialized with {model_config.model_type} model")
     
+    def _build_system_message(self, tree: WritingTree) -> Dict[str, str]:
+        """Build the system message with the story-wide context.
+        
+        Args:
+            tree: Complete writing tree for context
+            
+        Returns:
+            System message shared by every text request of the tree
+        """
+        root_node = tree.get_node("root")
+        story_vars = node_prompt_vars(root_node, self._unspecified)
+        story_vars["root_content"] = root_node.get("content", "")
+        return {"role": "system", "content": format_template(self._system_template, **story_vars)}
+    
+    def build_request(
+        self,
+        node: Dict,
+        outline: str,
+        tree: WritingTree
+    ) -> Dict[str, Any]:
+        """Build the chat completion request for a leaf node's text.
+        
+        Args:
+            node: Leaf node metadata
+            outline: Writing outline from thinking model
+            tree: Complete writing tree for context
+            
+        Returns:
+            Keyword arguments for client.chat.completions.create
+        """
+        # Get context from tree
+        root_node = tree.get_node("root")
+        root_content = root_node.get("content", "")
+        
+        # Get previous content (simplified: just use empty for now)
+        previous_content = ""
+        
+        # Prepare prompt variables
+        prompt_vars = node_prompt_vars(node, self._unspecified)
+        prompt_vars["outline"] = outline
+        prompt_vars["root_content"] = root_content
+        prompt_vars["previous_content"] = previous_content
+        
+        messages = []
+        if self._system_template is not None:
+            messages.append(self._build_system_message(tree))
+        messages.append({"role": "user", "content": format_template(self._user_template, **prompt_vars)})
+        
+        return {
+            "model": self.model_config.model_name,
+            "messages": messages,
+            "temperature": self.model_config.temperature,
+            "top_p": self.model_config.top_p,
+            "max_tokens": self.model_config.max_tokens,
+        }
+    
     def generate_text(
         self,
         node: Dict,
@@ -83,54 +166,205 @@ class WritingModel:
             GenerationError: If text generation fails
         """
         try:
-            # Get context from tree
-            root_node = tree.get_node("root")
-            root_content = root_node.get("content", "")
-            
-            # Get previous content (simplified: just use empty for now)
-            previous_content = ""
-            
-            # Prepare prompt variables
-            prompt_vars = {
-                "content": node.get("content", ""),
-                "outline": outline,
-                "word_count": node.get("word_count", 0),
-                "story_setting": node.get("story_setting", "未指定"),
-                "character_list": str(node.get("character_list", [])),
-                "writing_tone": node.get("writing_tone", "未指定"),
-                "language_style": node.get("language_style", "未指定"),
-                "theme": node.get("theme", "未指定"),
-                "plot_development": node.get("plot_development", "未指定"),
-                "worldbuilding": node.get("worldbuilding", "未指定"),
-                "writing_goals": node.get("writing_goals", "未指定"),
-                "root_content": root_content,
-                "previous_content": previous_content,
-            }
-            
-            # Format prompt
-            prompt = format_template(self.prompt_template, **prompt_vars)
-            
-            # Call LLM
-            response = self.client.chat.completions.create(
-                model=self.model_config.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.model_config.temperature,
-                top_p=self.model_config.top_p,
-                max_tokens=self.model_config.max_tokens
+            response = call_with_retry(
+                self.client.chat.completions.create,
+                **self.build_request(node, outline, tree)
             )
+            return self._read_text(response, node)
+        except Exception as e:
+            raise self._generation_error("text", node, e)
+    
+    async def agenerate_text(
+        self,
+        node: Dict,
+        outline: str,
+        tree: WritingTree,
+        client: AsyncOpenAI
+    ) -> str:
+        """Generate text content for a leaf node without blocking.
+        
+        Args:
+            node: Leaf node metadata
+            outline: Writing outline from thinking model
+            tree: Complete writing tree for context
+            client: Async OpenAI client to send the request with
+            
+        Returns:
+            Generated text content
+            
+        Raises:
+            GenerationError: If text generation fails
+        """
+        try:
+            response = await acall_with_retry(
+                client.chat.completions.create,
+                **self.build_request(node, outline, tree)
+            )
+            return self._read_text(response, node)
+        except Exception as e:
+            raise self._generation_error("text", node, e)
+    
+    def build_fused_request(
+        self,
+        node: Dict,
+        tree: WritingTree
+    ) -> Dict[str, Any]:
+        """Build the chat completion request for a leaf's outline and text.
+        
+        The request starts with the same system message as build_request,
+        so both kinds of calls share the cached prefix.
+        
+        Args:
+            node: Leaf node metadata
+            tree: Complete writing tree for context
+            
+        Returns:
+            Keyword arguments for client.chat.completions.create
+            
+        Raises:
+            ValueError: If fusion is disabled by a custom prompt template
+        """
+        if self.fused_template is None:
+            raise ValueError("Fused generation is not available with a custom prompt template")
+        
+        prompt = format_template(self.fused_template, **node_prompt_vars(node, self._unspecified))
+        
+        return {
+            "model": self.model_config.model_name,
+            "messages": [
+                self._build_system_message(tree),
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": self.model_config.temperature,
+            "top_p": self.model_config.top_p,
+            "max_tokens": self.model_config.max_tokens,
+        }
+    
+    def _parse_fused_response(self, response_text: str) -> Tuple[str, str]:
+        """Parse the outline and text from a fused response.
+        
+        Args:
+            response_text: Response expected to hold a JSON object with
+                "outline" and "text" strings
             
-            text = response.choices[0].message.content
-            word_count = count_words(text)
+        Returns:
+            Tuple of (outline, text)
             
-            logger.info(f"Generated text: {word_count} words (target: {node.get('word_count', 0)})")
-            logger.debug(f"Text preview: {text[:200]}...")
+        Raises:
+            ValueError: If the response has no such JSON object
+        """
+        json_str = extract_json(response_text)
+        if json_str is None:
+            raise ValueError("No JSON object in response")
+        
+        result = _json_loads(json_str)
+        outline = result.get("outline") if isinstance(result, dict) else None
+        text = result.get("text") if isinstance(result, dict) else None
+        if not isinstance(outline, str) or not isinstance(text, str) or not text:
+            raise ValueError("Response lacks outline or text")
+        
+        return outline, text
+    
+    def generate_outline_and_text(
+        self,
+        node: Dict,
+        tree: WritingTree
+    ) -> Tuple[str, str]:
+        """Generate outline and text for a small leaf node in one call.
+        
+        Args:
+            node: Leaf node metadata
+            tree: Complete writing tree for context
             
-            return text
+        Returns:
+            Tuple of (outline, text)
             
+        Raises:
+            GenerationError: If the call fails or its response cannot be parsed
+        """
+        try:
+            response = call_with_retry(
+                self.client.chat.completions.create,
+                **self.build_fused_request(node, tree)
+            )
+            return self._read_fused(response, node)
         except Exception as e:
-            logger.error(f"Text generation failed: {e}")
-            raise GenerationError(
-                f"Failed to generate text: {e}",
-                node_name=node.get("content", "unknown"),
-                context={"node": node}
+            raise self._generation_error("outline and text", node, e)
+    
+    async def agenerate_outline_and_text(
+        self,
+        node: Dict,
+        tree: WritingTree,
+        client: AsyncOpenAI
+    ) -> Tuple[str, str]:
+        """Generate outline and text for a small leaf node without blocking.
+        
+        Args:
+            node: Leaf node metadata
+            tree: Complete writing tree for context
+            client: Async OpenAI client to send the request with
+            
+        Returns:
+            Tuple of (outline, text)
+            
+        Raises:
+            GenerationError: If the call fails or its response cannot be parsed
+        """
+        try:
+            response = await acall_with_retry(
+                client.chat.completions.create,
+                **self.build_fused_request(node, tree)
             )
+            return self._read_fused(response, node)
+        except Exception as e:
+            raise self._generation_error("outline and text", node, e)
+    
+    def _read_text(self, response: Any, node: Dict) -> str:
+        """Get the text from a chat completion response.
+        
+        Args:
+            response: Chat completion for a build_request request
+            node: Leaf node metadata
+            
+        Returns:
+            Generated text content
+        """
+        text = response.choices[0].message.content
+        logger.info(f"Generated text: {count_words(text)} words (target: {node.get('word_count', 0)})")
+        logger.debug(f"Text preview: {text[:200]}...")
+        return text
+    
+    def _read_fused(self, response: Any, node: Dict) -> Tuple[str, str]:
+        """Get the outline and text from a fused chat completion response.
+        
+        Args:
+            response: Chat completion for a build_fused_request request
+            node: Leaf node metadata
+            
+        Returns:
+            Tuple of (outline, text)
+            
+        Raises:
+            ValueError: If the response cannot be parsed
+        """
+        outline, text = self._parse_fused_response(response.choices[0].message.content)
+        logger.info(f"Generated outline and text: {count_words(text)} words (target: {node.get('word_count', 0)})")
+        return outline, text
+    
+    def _generation_error(self, what: str, node: Dict, error: Exception) -> GenerationError:
+        """Log a failed generation call and wrap its error.
+        
+        Args:
+            what: What was being generated, e.g. "text"
+            node: Leaf node metadata
+            error: Error raised by the call or while reading its response
+            
+        Returns:
+            GenerationError to raise
+        """
+        logger.error(f"Failed to generate {what}: {error}")
+        return GenerationError(
+            f"Failed to generate {what}: {error}",
+            node_name=node.get("content", "unknown"),
+            context={"node": node}
+        )